@@ -0,0 +1,176 @@
+import queue
+import threading
+import time
+
+import torch
+
+
+def length_buckets(lengths, batch_size, max_pad_ratio=0):
+    """Groups item indices, longest first, into batches of at most batch_size so each batch can be
+    padded to its own longest item. With max_pad_ratio > 0 a batch is also split where its longest
+    item would exceed max_pad_ratio times its shortest, so padding wastes little.
+    """
+    batch_size = max(1, batch_size)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    buckets = []
+    for i in order:
+        if buckets:
+            bucket = buckets[-1]
+            fits = len(bucket) < batch_size
+            if fits and max_pad_ratio > 0:
+                fits = lengths[bucket[0]] <= max_pad_ratio * max(lengths[i], 1)
+            if fits:
+                bucket.append(i)
+                continue
+        buckets.append([i])
+    return buckets
+
+
+def generate_in_length_buckets(model, tokenizer, prompts, device, max_length=150, max_batch_size=16, max_pad_ratio=1.5, stats=None):
+    """Decodes prompts with model.generate, padding each length bucket only to its own longest
+    prompt. Returns the decoded strings in prompt order. When given, stats accumulates the number
+    of generate calls ("batches") and of input positions including padding ("padded_tokens").
+    """
+    encoded = tokenizer(list(prompts))["input_ids"]
+    decoded = [None] * len(encoded)
+    for bucket in length_buckets([len(ids) for ids in encoded], max_batch_size, max_pad_ratio):
+        batch = tokenizer.pad({"input_ids": [encoded[i] for i in bucket]}, padding="longest", return_tensors="pt")
+        input_ids, attention_mask = batch["input_ids"].to(device), batch["attention_mask"].to(device)
+        if stats is not None:
+            stats["batches"] = stats.get("batches", 0) + 1
+            stats["padded_tokens"] = stats.get("padded_tokens", 0) + input_ids.numel()
+
+        with torch.no_grad():
+            outputs = model.generate(input_ids=input_ids, attention_mask=attention_mask, max_length=max_length)
+
+        for i, out in zip(bucket, outputs):
+            decoded[i] = tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+    return decoded
+
+
+class _PendingPrompts:
+    def __init__(self, prompts):
+        self.prompts = prompts
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchScheduler:
+    """Runs "context: ... answer: ..." prompts from concurrent requests through a shared T5 model.
+
+    Prompts submitted by different threads are collected for up to max_wait_ms, or until
+    max_batch_size prompts are waiting, and then decoded with a single generate call. Each caller
+    receives the decoded outputs for its own prompts, in order. Prompts are run in length buckets
+    (see generate_in_length_buckets).
+    """
+
+    def __init__(self, model, tokenizer, device, max_batch_size=16, max_wait_ms=10, max_length=150, max_pad_ratio=1.5):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_length = max_length
+        self.max_pad_ratio = max_pad_ratio
+        self.stats = {"batches": 0, "prompts": 0, "requests": 0, "generate_calls": 0, "padded_tokens": 0}
+        self._queue = queue.Queue()
+        self._stopped = False
+        # Guards _stopped together with the queue, so nothing is queued after close().
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="qg-batch-scheduler", daemon=True)
+        self._worker.start()
+
+    def generate(self, prompts):
+        """Blocks until all prompts have been decoded and returns the decoded strings."""
+        if not prompts:
+            return []
+        pending = _PendingPrompts(list(prompts))
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("BatchScheduler has been closed")
+            self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def close(self):
+        """Stops the worker once the prompts queued so far are decoded. Later calls to generate()
+        raise RuntimeError."""
+        with self._lock:
+            self._stopped = True
+            self._queue.put(None)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            closing = False
+            num_prompts = len(first.prompts)
+            deadline = time.monotonic() + self.max_wait
+            while num_prompts < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                num_prompts += len(item.prompts)
+
+            self._process(batch)
+            if closing:
+                break
+
+        # Fail anything still queued so callers do not block forever. generate() cannot queue more
+        # once _stopped is set, and it is set by now.
+        with self._lock:
+            self._stopped = True
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    item.error = RuntimeError("BatchScheduler has been closed")
+                    item.done.set()
+
+    def _process(self, batch):
+        prompts = [prompt for item in batch for prompt in item.prompts]
+        try:
+            decoded = self._generate(prompts)
+        except Exception as e:
+            for item in batch:
+                item.error = e
+                item.done.set()
+            return
+
+        self.stats["batches"] += 1
+        self.stats["prompts"] += len(prompts)
+        self.stats["requests"] += len(batch)
+
+        offset = 0
+        for item in batch:
+            item.results = decoded[offset:offset + len(item.prompts)]
+            offset += len(item.prompts)
+            item.done.set()
+
+    def _generate(self, prompts):
+        stats = {}
+        decoded = generate_in_length_buckets(
+            self.model,
+            self.tokenizer,
+            prompts,
+            self.device,
+            max_length=self.max_length,
+            max_batch_size=self.max_batch_size,
+            max_pad_ratio=self.max_pad_ratio,
+            stats=stats,
+        )
+        self.stats["generate_calls"] += stats.get("batches", 0)
+        self.stats["padded_tokens"] += stats.get("padded_tokens", 0)
+        return decoded
@@ -0,0 +1,62 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+_worker = threading.local()
+
+
+def partition_torch_threads(num_workers, cores=None):
+    """Returns the intra-op thread count that lets num_workers generators run side by side
+    without oversubscribing the available cores.
+    """
+    if cores is None:
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return max(1, (cores or 1) // max(1, num_workers))
+
+
+def in_generator_pool():
+    """Whether the calling thread is a GeneratorPool worker."""
+    return getattr(_worker, "in_pool", False)
+
+
+class GeneratorPool:
+    """Bounded thread pool that runs the independent generators of one request concurrently.
+
+    Each worker thread runs torch with cores // max_workers intra-op threads (or torch_threads if
+    given). Model calls release the GIL, so the workers overlap on the partitioned cores instead of
+    each one claiming all of them. Other threads, e.g. the ones serving single-generator
+    endpoints, keep the process default. Code running in a worker can check in_generator_pool(),
+    e.g. to decode on the worker instead of handing prompts to a thread outside the partition.
+    """
+
+    def __init__(self, max_workers=3, torch_threads=0):
+        self.max_workers = max_workers
+        self.torch_threads = torch_threads or partition_torch_threads(max_workers)
+        default_threads = torch.get_num_threads()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="generator", initializer=self._limit_threads
+        )
+        # Start every worker now. torch.set_num_threads in a worker also changes the count that
+        # threads started later pick up, so the default is restored once all workers are limited.
+        barrier = threading.Barrier(max_workers)
+        for future in [self._executor.submit(barrier.wait) for _ in range(max_workers)]:
+            future.result()
+        torch.set_num_threads(default_threads)
+
+    def _limit_threads(self):
+        # Initialize this thread's default first, so torch's lazy per-thread setup cannot undo the limit.
+        torch.get_num_threads()
+        torch.set_num_threads(self.torch_threads)
+        _worker.in_pool = True
+
+    def run(self, tasks):
+        """Runs a dict of name -> callable and returns a dict of name -> result once all of them
+        have finished. The first exception raised by a task is re-raised.
+        """
+        futures = {name: self._executor.submit(task) for name, task in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
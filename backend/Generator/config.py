@@ -0,0 +1,136 @@
+import os
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def env_float(name, default):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def env_str(name, default):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def env_list(name, default=()):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Memory budget for lazily loaded models, in MB. 0 disables eviction.
+MODEL_MEMORY_BUDGET_MB = env_int("EDUAID_MODEL_MEMORY_BUDGET_MB", 0)
+
+# Comma separated model names to load at startup instead of on first request.
+PRELOAD_MODELS = env_list("EDUAID_PRELOAD_MODELS")
+
+# Cross-request batching for the Question-Generator T5 model used by /get_mcq and /get_shortq.
+# Prompts are collected for up to QG_BATCH_WINDOW_MS or until QG_MAX_BATCH_SIZE are waiting.
+QG_BATCHING = env_int("EDUAID_QG_BATCHING", 1) == 1
+QG_BATCH_WINDOW_MS = env_float("EDUAID_QG_BATCH_WINDOW_MS", 10.0)
+QG_MAX_BATCH_SIZE = env_int("EDUAID_QG_MAX_BATCH_SIZE", 16)
+# Prompts are padded to the longest prompt of their batch; a batch is split when its longest prompt
+# is more than QG_MAX_PAD_RATIO times its shortest (0 only splits on QG_MAX_BATCH_SIZE).
+QG_MAX_PAD_RATIO = env_float("EDUAID_QG_MAX_PAD_RATIO", 1.5)
+
+# Batch size for QuestionGenerator (the hard-mode endpoints). 1 generates one input at a time.
+QUESTION_GENERATOR_BATCH_SIZE = env_int("EDUAID_QUESTION_GENERATOR_BATCH_SIZE", 8)
+QA_EVALUATOR_BATCH_SIZE = env_int("EDUAID_QA_EVALUATOR_BATCH_SIZE", 16)
+
+# Mini-batch size of /get_shortq_answer, /get_mcq_answer, AnswerPredictor.predict_answer and the
+# boolean answer NLI scorer, which answer all questions about one text in a single call.
+ANSWER_BATCH_SIZE = env_int("EDUAID_ANSWER_BATCH_SIZE", 16)
+
+# Retrieve-then-read answering for long texts, off by default. Texts of more than
+# ANSWER_RETRIEVAL_MIN_WORDS words (0 disables) are split into windows of ANSWER_WINDOW_WORDS words
+# every ANSWER_WINDOW_STRIDE words, and each question is answered from its ANSWER_TOP_WINDOWS best windows by BM25.
+ANSWER_RETRIEVAL_MIN_WORDS = env_int("EDUAID_ANSWER_RETRIEVAL_MIN_WORDS", 0)
+ANSWER_WINDOW_WORDS = env_int("EDUAID_ANSWER_WINDOW_WORDS", 150)
+ANSWER_WINDOW_STRIDE = env_int("EDUAID_ANSWER_WINDOW_STRIDE", 75)
+ANSWER_TOP_WINDOWS = env_int("EDUAID_ANSWER_TOP_WINDOWS", 2)
+
+# Encode each QuestionGenerator context once and reuse it for every answer drawn from it.
+# Faster on long articles, but approximate: answer tokens no longer attend to the context.
+QG_SHARED_CONTEXT_ENCODING = env_int("EDUAID_QG_SHARED_CONTEXT_ENCODING", 0) == 1
+
+# Result cache for the generation endpoints. Set EDUAID_RESULT_CACHE=0 to disable it, or send
+# "bypass_cache": true with a request to skip it for that request.
+RESULT_CACHE = env_int("EDUAID_RESULT_CACHE", 1) == 1
+RESULT_CACHE_PATH = env_str("EDUAID_RESULT_CACHE_PATH", "result_cache.sqlite3")
+RESULT_CACHE_MEMORY_ENTRIES = env_int("EDUAID_RESULT_CACHE_MEMORY_ENTRIES", 256)
+RESULT_CACHE_DISK_ENTRIES = env_int("EDUAID_RESULT_CACHE_DISK_ENTRIES", 10000)
+RESULT_CACHE_TTL_SECONDS = env_int("EDUAID_RESULT_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+
+# Part of every result cache key; bump it when models or generation code change.
+MODEL_VERSION = env_str("EDUAID_MODEL_VERSION", "1")
+
+# Run the generators of combined endpoints (/get_problems) concurrently on a bounded thread pool.
+# torch intra-op threads are split between the workers; EDUAID_TORCH_THREADS=0 means cores // workers.
+CONCURRENT_GENERATORS = env_int("EDUAID_CONCURRENT_GENERATORS", 0) == 1
+GENERATOR_WORKERS = env_int("EDUAID_GENERATOR_WORKERS", 3)
+TORCH_THREADS = env_int("EDUAID_TORCH_THREADS", 0)
+
+# Asynchronous jobs (POST /jobs). Jobs are queued in the SQLite file JOBS_PATH and run by
+# JOB_WORKERS local threads, with at most JOB_FAMILY_LIMITS ("<family>=<n>", comma separated,
+# default 1 each) jobs of one model family running at once. Processes sharing JOBS_PATH renew the
+# lease of their running jobs; jobs whose lease is older than JOB_LEASE_SECONDS are queued again.
+JOBS = env_int("EDUAID_JOBS", 1) == 1
+JOBS_PATH = env_str("EDUAID_JOBS_PATH", "jobs.sqlite3")
+JOB_WORKERS = env_int("EDUAID_JOB_WORKERS", 2)
+JOB_FAMILY_LIMITS = env_list("EDUAID_JOB_FAMILY_LIMITS", [])
+JOB_RETENTION_SECONDS = env_int("EDUAID_JOB_RETENTION_SECONDS", 24 * 3600)
+JOB_LEASE_SECONDS = env_int("EDUAID_JOB_LEASE_SECONDS", 60)
+
+# Memory-mapped sense2vec store (built with `python -m Generator.s2v_store s2v_old s2v_mmap`).
+# When the directory exists it replaces the in-memory sense2vec model, so forked workers share one copy.
+S2V_STORE = env_str("EDUAID_S2V_STORE", "s2v_mmap")
+
+# Batched sense2vec distractor search. The normalized vectors and the optional neighbour index
+# (built with `python -m Generator.distractors`) are stored in S2V_CACHE_DIR. On by default only
+# with the memory-mapped store: over the stock s2v_old model every process builds its own key
+# tables and a normalized copy of the vectors.
+DISTRACTOR_ENGINE = env_int(
+    "EDUAID_DISTRACTOR_ENGINE", 1 if os.path.exists(os.path.join(S2V_STORE, "meta.json")) else 0
+) == 1
+S2V_CACHE_DIR = env_str("EDUAID_S2V_CACHE_DIR", "s2v_cache")
+
+# Compact Brown corpus frequency table (built with `python -m Generator.word_freq brown_freq`).
+# Used instead of counting brown.words() at startup when the directory exists.
+BROWN_FREQ_PATH = env_str("EDUAID_BROWN_FREQ_PATH", "brown_freq")
+
+# Keyphrase extractor used by DocumentAnalysis: "positionrank" ranks noun phrases of the existing
+# spaCy parse, "multipartite" runs pke MultipartiteRank (see `python -m benchmarks.keyphrases`).
+KEYPHRASE_EXTRACTOR = env_str("EDUAID_KEYPHRASE_EXTRACTOR", "positionrank")
+
+# Dynamic int8 quantization of the Linear layers of every T5 model at load time, CPU only
+# (see `python -m benchmarks.quantization` for the quality, latency and memory comparison).
+QUANTIZE_INT8 = env_int("EDUAID_QUANTIZE_INT8", 0) == 1
+
+# Inference backend of the T5 models, the QA evaluator and the NLI model: "torch" (eager PyTorch)
+# or "onnx" (ONNX Runtime on CPU, needs optimum[onnxruntime]). Exported models are kept in ONNX_DIR
+# (`python -m Generator.onnx_backend` exports them ahead of time).
+INFERENCE_BACKEND = env_str("EDUAID_INFERENCE_BACKEND", "torch")
+ONNX_DIR = env_str("EDUAID_ONNX_DIR", "onnx_models")
+
+# Decoding policy of the boolean question generator: "beam" (10-beam search over the whole
+# passage), "sampling" (nucleus sampling with BOOLQ_TOP_P), "diverse_beam" (one beam group per
+# question) or "chunks" (one short prompt per group of sentences, decoded as a single batch).
+# See `python -m benchmarks.boolq_decoding` for the latency and diversity of each.
+BOOLQ_DECODING_POLICIES = ("beam", "sampling", "diverse_beam", "chunks")
+BOOLQ_DECODING = env_str("EDUAID_BOOLQ_DECODING", "beam")
+if BOOLQ_DECODING not in BOOLQ_DECODING_POLICIES:
+    raise ValueError(
+        "Unknown EDUAID_BOOLQ_DECODING %r, expected one of %s" % (BOOLQ_DECODING, ", ".join(BOOLQ_DECODING_POLICIES))
+    )
+BOOLQ_TOP_P = env_float("EDUAID_BOOLQ_TOP_P", 0.9)
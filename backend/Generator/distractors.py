@@ -0,0 +1,198 @@
+import argparse
+import os
+
+import numpy as np
+
+from Generator.mcq import filter_similar_words
+from Generator.s2v_store import MmapSense2Vec, top_k_rows
+
+
+class DistractorEngine:
+    """Batched nearest-neighbour search over the sense2vec vectors, used to find distractors.
+
+    The vectors are L2-normalized once into a float32 matrix which is saved under cache_dir and
+    memory-mapped on later loads. Neighbours of a whole batch of answers are found with one matrix
+    product per block of rows plus a partial sort. An optional neighbour index, prebuilt for the
+    most frequent keys, answers those keys without touching the matrix. When s2v is a
+    MmapSense2Vec store its matrix and key lookup are used directly and cache_dir is not needed.
+    """
+
+    def __init__(self, s2v, cache_dir=None, neighbour_index=None, block_size=262144):
+        self.s2v = s2v
+        self.block_size = block_size
+        if isinstance(s2v, MmapSense2Vec):
+            self.vectors = s2v.vectors
+            self.row = s2v.row
+            self.key = s2v.key
+        else:
+            keys = self._row_keys(s2v)
+            key_rows = {key: row for row, key in enumerate(keys) if key is not None}
+            self.vectors = self._load_normalized(s2v.vectors.data, cache_dir)
+            self.row = key_rows.get
+            self.key = keys.__getitem__
+        self.index_positions = None
+        if neighbour_index and os.path.isdir(neighbour_index):
+            self.load_neighbour_index(neighbour_index)
+
+    @staticmethod
+    def _row_keys(s2v):
+        keys = [None] * s2v.vectors.data.shape[0]
+        for key, row in s2v.vectors.key2row.items():
+            if keys[row] is None:
+                keys[row] = s2v.strings[key]
+        return keys
+
+    def _load_normalized(self, data, cache_dir):
+        path = os.path.join(cache_dir, "vectors.f32.npy") if cache_dir else None
+        if path and os.path.exists(path):
+            vectors = np.load(path, mmap_mode="r")
+            if vectors.shape == data.shape:
+                return vectors
+
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            vectors = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=data.shape)
+        else:
+            vectors = np.empty(data.shape, dtype=np.float32)
+
+        for start in range(0, data.shape[0], self.block_size):
+            block = np.asarray(data[start:start + self.block_size], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            vectors[start:start + self.block_size] = block / norms
+
+        if path:
+            vectors.flush()
+            del vectors
+            return np.load(path, mmap_mode="r")
+        return vectors
+
+    def most_similar_batch(self, keys, n=15):
+        """Returns, for each sense2vec key, its n most similar keys as (key, score) pairs."""
+        results = [None] * len(keys)
+        pending = []
+        for i, key in enumerate(keys):
+            indexed = self._lookup_index(key, n)
+            if indexed is not None:
+                results[i] = indexed
+            else:
+                pending.append(i)
+
+        if pending:
+            rows = np.array([self.row(keys[i]) for i in pending])
+            best_rows, best_scores = self._top_rows(rows, n + 1)
+            for i, row, neighbour_rows, scores in zip(pending, rows, best_rows, best_scores):
+                results[i] = [
+                    (self.key(r), float(score))
+                    for r, score in zip(neighbour_rows, scores)
+                    if r != row and self.key(r) is not None
+                ][:n]
+
+        return results
+
+    def _top_rows(self, rows, k):
+        return top_k_rows(self.vectors, self.vectors[rows], k, self.block_size)
+
+    def _frequent_rows(self, top):
+        if isinstance(self.s2v, MmapSense2Vec):
+            return np.argsort(-np.asarray(self.s2v.freqs), kind="stable")[:top].astype(np.int64)
+        keys = [self.key(row) for row in range(self.vectors.shape[0])]
+        frequent = sorted((key for key in keys if key is not None), key=lambda key: self.s2v.get_freq(key) or 0, reverse=True)[:top]
+        return np.array([self.row(key) for key in frequent], dtype=np.int64)
+
+    def answer_choices(self, answers, n=15):
+        """Batched get_answer_choices: returns a (choices, algorithm) tuple for every answer. As
+        with get_answer_choices, an answer whose distractors cannot be found gets no choices
+        instead of failing the others."""
+        senses = [self._known_sense(answer) for answer in answers]
+        known = list(dict.fromkeys(sense for sense in senses if sense is not None))
+        try:
+            neighbours = dict(zip(known, self.most_similar_batch(known, n)))
+        except Exception:
+            # Search the keys one at a time so only the failing ones go without neighbours.
+            neighbours = {}
+            for sense in known:
+                try:
+                    neighbours[sense] = self.most_similar_batch([sense], n)[0]
+                except Exception as e:
+                    print(f"Failed to find neighbours of {sense}. Error: {e}")
+
+        results = []
+        for answer, sense in zip(answers, senses):
+            choices = []
+            if sense in neighbours:
+                try:
+                    choices = filter_similar_words(answer, neighbours[sense])
+                except Exception as e:
+                    print(f"Failed to generate choices for word: {answer}. Error: {e}")
+            results.append((choices, "sense2vec" if choices else "None"))
+        return results
+
+    def _known_sense(self, answer):
+        """The best sense2vec key of answer, or None if it has no row in the vectors."""
+        try:
+            sense = self.s2v.get_best_sense(answer.replace(" ", "_"))
+            if sense is not None and self.row(sense) is not None:
+                return sense
+        except Exception as e:
+            print(f"Failed to generate choices for word: {answer}. Error: {e}")
+        return None
+
+    def build_neighbour_index(self, path, top=50000, n=15, batch_size=256):
+        """Precomputes the n nearest neighbours of the `top` most frequent keys into path."""
+        rows = self._frequent_rows(top)
+        neighbours = np.full((len(rows), n), -1, dtype=np.int64)
+        scores = np.zeros((len(rows), n), dtype=np.float32)
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            best_rows, best_scores = self._top_rows(batch, n + 1)
+            for i, (row, neighbour_rows, neighbour_scores) in enumerate(zip(batch, best_rows, best_scores)):
+                keep = neighbour_rows != row
+                count = min(n, int(keep.sum()))
+                neighbours[start + i, :count] = neighbour_rows[keep][:count]
+                scores[start + i, :count] = neighbour_scores[keep][:count]
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "rows.npy"), rows)
+        np.save(os.path.join(path, "neighbours.npy"), neighbours)
+        np.save(os.path.join(path, "scores.npy"), scores)
+        self.load_neighbour_index(path)
+
+    def load_neighbour_index(self, path):
+        rows = np.load(os.path.join(path, "rows.npy"))
+        self.index_neighbours = np.load(os.path.join(path, "neighbours.npy"), mmap_mode="r")
+        self.index_scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+        self.index_positions = {int(row): position for position, row in enumerate(rows)}
+
+    def _lookup_index(self, key, n):
+        if self.index_positions is None or n > self.index_neighbours.shape[1]:
+            return None
+        position = self.index_positions.get(self.row(key))
+        if position is None:
+            return None
+        return [
+            (self.key(r), float(score))
+            for r, score in zip(self.index_neighbours[position, :n], self.index_scores[position, :n])
+            if r >= 0
+        ]
+
+
+def main():
+    from sense2vec import Sense2Vec
+
+    parser = argparse.ArgumentParser(description="Prepare the sense2vec distractor engine files.")
+    parser.add_argument("--s2v", default="s2v_old", help="sense2vec model or memory-mapped store directory")
+    parser.add_argument("--cache-dir", default="s2v_cache", help="where the normalized vectors are stored")
+    parser.add_argument("--top", type=int, default=50000, help="number of frequent keys to index")
+    parser.add_argument("--n", type=int, default=15, help="neighbours stored per key")
+    args = parser.parse_args()
+
+    s2v = MmapSense2Vec(args.s2v) if MmapSense2Vec.exists(args.s2v) else Sense2Vec().from_disk(args.s2v)
+    engine = DistractorEngine(s2v, cache_dir=args.cache_dir)
+    engine.build_neighbour_index(os.path.join(args.cache_dir, "neighbours"), top=args.top, n=args.n)
+    print(f"Indexed {len(engine.index_positions)} keys into {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from Generator.mcq import (
+    tokenize_into_sentences,
+    extract_phrases_from_doc,
+    select_keywords,
+    is_word_available,
+)
+from Generator.keyphrases import MultipartiteRankExtractor
+from Generator.keyword_index import DocumentKeywordIndex
+
+
+class DocumentAnalysis:
+    """NLP preprocessing of one input text, shared by the MCQ, short-answer and boolean generators.
+
+    Sentences are split up front; the spaCy parse, keyphrases, sense2vec lookups and keyword to
+    sentence mappings are computed on first use and reused by every generator that receives the
+    same analysis. Time spent in each stage is accumulated in `timings`; a stage nested in another
+    is only counted under the inner one. Stages run by one thread add up to that thread's time, but
+    stages of generators running concurrently overlap, so their sum can exceed the wall-clock
+    total. keyphrase_extractor is a Generator.keyphrases.KeyphraseExtractor and defaults to pke
+    MultipartiteRank.
+    """
+
+    def __init__(self, text, nlp, s2v, fdist, normalized_levenshtein, keyphrase_extractor=None):
+        self.text = text
+        self.nlp = nlp
+        self.s2v = s2v
+        self.fdist = fdist
+        self.normalized_levenshtein = normalized_levenshtein
+        self.keyphrase_extractor = keyphrase_extractor or MultipartiteRankExtractor()
+        self.timings = OrderedDict()
+        # Generators may share one analysis from different threads.
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+        with self.timed("sentences"):
+            self.sentences = tokenize_into_sentences(text)
+        self.modified_text = " ".join(self.sentences)
+
+        self._doc = None
+        self._noun_phrases = None
+        self._doc_phrases = None
+        self._available = {}
+        self._keywords = {}
+        self._keyword_index = None
+
+    @contextmanager
+    def timed(self, stage):
+        # Per thread, the time spent in stages nested in each open stage.
+        nested = self._local.__dict__.setdefault("nested", [])
+        nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            exclusive = elapsed - nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            with self._lock:
+                self.timings[stage] = self.timings.get(stage, 0.0) + exclusive
+
+    def prepare(self):
+        """Computes the spaCy parse and keyphrases up front, so generators sharing this analysis
+        from different threads do not wait on each other for them."""
+        self.noun_phrases
+        self.doc_phrases
+
+    @property
+    def doc(self):
+        with self._lock:
+            if self._doc is None:
+                with self.timed("spacy"):
+                    self._doc = self.nlp(self.modified_text)
+            return self._doc
+
+    @property
+    def noun_phrases(self):
+        """Keyphrases of the text, sorted by their Brown corpus frequency."""
+        with self._lock:
+            if self._noun_phrases is None:
+                doc = self.doc if self.keyphrase_extractor.uses_doc else None
+                with self.timed("keyphrases"):
+                    keywords = self.keyphrase_extractor.extract(self.modified_text, doc)
+                    self._noun_phrases = sorted(keywords, key=lambda x: self.fdist[x])
+            return self._noun_phrases
+
+    @property
+    def doc_phrases(self):
+        with self._lock:
+            if self._doc_phrases is None:
+                doc = self.doc
+                with self.timed("keyphrases"):
+                    self._doc_phrases = extract_phrases_from_doc(doc)
+            return self._doc_phrases
+
+    def is_available(self, phrase):
+        with self._lock:
+            if phrase not in self._available:
+                self._available[phrase] = is_word_available(phrase, self.s2v)
+            return self._available[phrase]
+
+    def keywords(self, max_keywords):
+        """Same result as identify_keywords for this text, without repeating the shared stages."""
+        max_keywords = int(max_keywords)
+        with self._lock:
+            if max_keywords not in self._keywords:
+                noun_phrases = self.noun_phrases
+                doc_phrases = self.doc_phrases
+                with self.timed("keywords"):
+                    self._keywords[max_keywords] = select_keywords(
+                        noun_phrases,
+                        doc_phrases,
+                        max_keywords,
+                        self.is_available,
+                        self.normalized_levenshtein,
+                        len(self.sentences),
+                    )
+            return list(self._keywords[max_keywords])
+
+    @property
+    def keyword_index(self):
+        """DocumentKeywordIndex over the sentences, shared by every keyword query on this text."""
+        with self._lock:
+            if self._keyword_index is None:
+                with self.timed("keyword_sentences"):
+                    self._keyword_index = DocumentKeywordIndex(self.sentences)
+            return self._keyword_index
+
+    def keyword_sentences(self, keywords, n=None):
+        """Returns a fresh keyword -> sentences dict (the n longest sentences per keyword), so
+        callers may replace its values."""
+        index = self.keyword_index
+        with self.timed("keyword_sentences"):
+            return index.keyword_sentences(keywords, n)
@@ -35,3 +35,71 @@ def topkp_decoding (inp_ids,attn_mask,model,tokenizer):
                                )
   Questions = [tokenizer.decode(out, skip_special_tokens=True,clean_up_tokenization_spaces=True) for out in topkp_output]
   return [Question.strip().capitalize() for Question in Questions]
+
+
+def sampling_decoding (inp_ids,attn_mask,model,tokenizer,num,top_p=0.9):
+  """num questions from one nucleus sampling pass: no beams to keep per step."""
+  sample_output = model.generate(input_ids=inp_ids,
+                                 attention_mask=attn_mask,
+                                 max_length=256,
+                               do_sample=True,
+                               top_k=0,
+                               top_p=top_p,
+                               num_return_sequences=num,
+                               no_repeat_ngram_size=2
+                               )
+  Questions = [tokenizer.decode(out, skip_special_tokens=True,clean_up_tokenization_spaces=True) for out in sample_output]
+  return [Question.strip().capitalize() for Question in Questions]
+
+
+def diverse_beam_decoding (inp_ids,attn_mask,model,tokenizer,num,diversity_penalty=1.0):
+  """Group beam search with one beam per requested question, so the beam width grows with num
+  instead of being fixed at 10, and the groups are pushed apart by diversity_penalty."""
+  beam_output = model.generate(input_ids=inp_ids,
+                                 attention_mask=attn_mask,
+                                 max_length=256,
+                               num_beams=num,
+                               num_beam_groups=num,
+                               diversity_penalty=diversity_penalty if num > 1 else 0.0,
+                               num_return_sequences=num,
+                               no_repeat_ngram_size=2,
+                               early_stopping=True
+                               )
+  Questions = [tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True) for out in
+               beam_output]
+  return [Question.strip().capitalize() for Question in Questions]
+
+
+def chunk_prompts (sentences,num):
+  """Splits sentences into at most num contiguous chunks of similar size."""
+  sentences = [sentence for sentence in sentences if sentence.strip()]
+  chunks = min(num, len(sentences))
+  if chunks == 0:
+    return []
+  size, extra = divmod(len(sentences), chunks)
+  out, start = [], 0
+  for i in range(chunks):
+    end = start + size + (1 if i < extra else 0)
+    out.append(" ".join(sentences[start:end]))
+    start = end
+  return out
+
+
+def chunked_beam_decoding (inp_ids,attn_mask,model,tokenizer,num,num_beams=4):
+  """One question per prompt of a batch of shorter (per chunk) prompts. When there are fewer
+  prompts than questions, each prompt returns enough beams to make up num; the best beam of
+  every prompt comes first."""
+  prompts = max(inp_ids.shape[0], 1)
+  per_prompt = -(-num // prompts)
+  beam_output = model.generate(input_ids=inp_ids,
+                                 attention_mask=attn_mask,
+                                 max_length=256,
+                               num_beams=max(num_beams, per_prompt),
+                               num_return_sequences=per_prompt,
+                               no_repeat_ngram_size=2,
+                               early_stopping=True
+                               )
+  Questions = [tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True) for out in
+               beam_output]
+  Questions = [Questions[prompt * per_prompt + rank] for rank in range(per_prompt) for prompt in range(prompts)]
+  return [Question.strip().capitalize() for Question in Questions][:num]
@@ -0,0 +1,279 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def parse_family_limits(items):
+    """Parses ["llm=2", "qg=1"] into {"llm": 2, "qg": 1}."""
+    limits = {}
+    for item in items:
+        family, sep, limit = item.partition("=")
+        if not sep or not family.strip():
+            raise ValueError("Expected <family>=<limit>, got %r" % item)
+        limits[family.strip()] = max(1, int(limit))
+    return limits
+
+
+class JobStore:
+    """Persistent job queue in a SQLite table.
+
+    Jobs move from queued to running to done or failed, or to cancelled at any point before they
+    finish. Several processes may share the file: a started job is owned by the process that
+    started it (host and pid) for a lease of lease_seconds, which that process renews with
+    heartbeat(). Running jobs whose lease expired, because their process died, are queued again by
+    requeue_expired(), which also runs when the store is opened. Finished jobs are deleted
+    retention_seconds after they finish. Payloads and results must be JSON serializable.
+    """
+
+    def __init__(self, path, retention_seconds=24 * 3600, lease_seconds=60):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self._host = socket.gethostname()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, endpoint TEXT NOT NULL, family TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner TEXT, heartbeat_at REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                # Files written before jobs had leases.
+                self._db.execute("ALTER TABLE jobs ADD COLUMN %s %s" % (column, kind))
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.commit()
+        self.requeued = self.requeue_expired()
+
+    @property
+    def owner(self):
+        # Read at every use, so a process forked after opening the store owns its own jobs.
+        return "%s:%d" % (self._host, os.getpid())
+
+    def submit(self, endpoint, families, payload):
+        """Queues a job that occupies the given model families and returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, endpoint, family, payload, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, endpoint, ",".join(families), json.dumps(payload), QUEUED, now),
+            )
+            self._db.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at <= ?",
+                (now - self.retention_seconds,),
+            )
+            self._db.commit()
+        return job_id
+
+    def get(self, job_id):
+        """The job as a dict, or None if it does not exist."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, endpoint, status, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row[0],
+            "endpoint": row[1],
+            "status": row[2],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7],
+        }
+        if row[3] is not None:
+            job["result"] = json.loads(row[3])
+        if row[4] is not None:
+            job["error"] = row[4]
+        return job
+
+    def queued(self):
+        """(id, endpoint, families) of the queued jobs, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, endpoint, family FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [(job_id, endpoint, tuple(family.split(","))) for job_id, endpoint, family in rows]
+
+    def start(self, job_id):
+        """Marks a queued job as running, owned by this process, and returns its payload, or None
+        if it is no longer queued."""
+        now = time.time()
+        with self._lock:
+            # A conditional update, so processes sharing the file never start the same job twice.
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, self.owner, now, job_id, QUEUED),
+            ).rowcount
+            self._db.commit()
+            if not updated:
+                return None
+            row = self._db.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0])
+
+    def finish(self, job_id, result=None, error=None):
+        """Stores the outcome of a job this process is running. Does nothing if the job was
+        cancelled meanwhile, or requeued after this process lost its lease."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (
+                    FAILED if error is not None else DONE,
+                    json.dumps(result) if error is None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                    RUNNING,
+                    self.owner,
+                ),
+            )
+            self._db.commit()
+
+    def heartbeat(self):
+        """Renews the lease of every job this process is running."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+                (time.time(), RUNNING, self.owner),
+            )
+            self._db.commit()
+
+    def requeue_expired(self):
+        """Queues again the running jobs whose lease expired and returns how many there were."""
+        with self._lock:
+            requeued = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at <= ?)",
+                (QUEUED, RUNNING, time.time() - self.lease_seconds),
+            ).rowcount
+            self._db.commit()
+        return requeued
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if it does not exist or has finished. A
+        running job is not interrupted, but its result is discarded."""
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount
+            self._db.commit()
+        return updated > 0
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobRunner:
+    """Local pool of worker threads that run queued jobs with execute(endpoint, payload).
+
+    At most family_limits.get(family, default_limit) jobs of one model family run at once, so a
+    burst of requests for one model does not occupy every worker. A job that uses several families
+    starts only when all of them have a free slot, and holds one slot of each until it finishes.
+    Jobs are taken oldest first among those that can start. An exception raised by execute marks
+    the job as failed. A heartbeat thread renews the leases of this process's running jobs and
+    requeues the jobs of processes that died. Workers start with start(), once execute is ready to
+    serve jobs queued by a previous process.
+    """
+
+    def __init__(self, store, execute, workers=2, family_limits=None, default_limit=1, poll_seconds=1.0):
+        self.store = store
+        self.execute = execute
+        self.family_limits = dict(family_limits or {})
+        self.default_limit = default_limit
+        self.poll_seconds = poll_seconds
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = False
+        self._threads = [
+            threading.Thread(target=self._work, name="job-worker-%d" % i, daemon=True) for i in range(workers)
+        ]
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+
+    def start(self):
+        self._heartbeat_thread.start()
+        for thread in self._threads:
+            thread.start()
+
+    def _heartbeat(self):
+        # Renewed several times per lease, so one slow write does not let a lease lapse.
+        while not self._stop_heartbeat.wait(self.store.lease_seconds / 3):
+            self.store.heartbeat()
+            if self.store.requeue_expired():
+                with self._wakeup:
+                    self._wakeup.notify_all()
+
+    def notify(self):
+        """Wakes an idle worker, e.g. after a job was submitted."""
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _claim(self):
+        """Starts the oldest queued job whose families all have a free slot. Called with the lock held."""
+        for job_id, endpoint, families in self.store.queued():
+            if any(self._running.get(family, 0) >= self.family_limits.get(family, self.default_limit) for family in families):
+                continue
+            payload = self.store.start(job_id)
+            if payload is not None:
+                for family in families:
+                    self._running[family] = self._running.get(family, 0) + 1
+                return job_id, endpoint, families, payload
+        return None
+
+    def _work(self):
+        while True:
+            with self._wakeup:
+                job = None
+                while not self._stopped:
+                    job = self._claim()
+                    if job is not None:
+                        break
+                    self._wakeup.wait(self.poll_seconds)
+                if job is None:
+                    return
+
+            job_id, endpoint, families, payload = job
+            try:
+                self.store.finish(job_id, result=self.execute(endpoint, payload))
+            except Exception as e:
+                self.store.finish(job_id, error=str(e) or type(e).__name__)
+            finally:
+                with self._wakeup:
+                    for family in families:
+                        self._running[family] -= 1
+                    # Slots of these families are free again.
+                    self._wakeup.notify_all()
+
+    def stats(self):
+        with self._lock:
+            running = {family: count for family, count in self._running.items() if count}
+        return {"workers": len(self._threads), "running": running, "jobs": self.store.counts()}
+
+    def shutdown(self):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._stop_heartbeat.set()
+        if self._heartbeat_thread.is_alive():
+            self._heartbeat_thread.join()
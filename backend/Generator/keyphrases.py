@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from Generator.mcq import extract_noun_phrases
+
+
+class KeyphraseExtractor(ABC):
+    """Interface for the keyphrase extraction step of DocumentAnalysis.
+
+    extract(text, doc, n) returns up to n lowercase keyphrases of text, best first. doc is the
+    spaCy parse of text; extractors that set uses_doc = False receive None instead, so the parse
+    is not forced on them.
+    """
+
+    name = None
+    uses_doc = True
+
+    @abstractmethod
+    def extract(self, text, doc, n=10):
+        """Up to n lowercase keyphrases of text, best first."""
+
+
+class MultipartiteRankExtractor(KeyphraseExtractor):
+    """pke MultipartiteRank, the original extractor. Parses the text again on every call."""
+
+    name = "multipartite"
+    uses_doc = False
+
+    def extract(self, text, doc, n=10):
+        return extract_noun_phrases(text)[:n]
+
+
+class PositionRankExtractor(KeyphraseExtractor):
+    """TextRank over the existing spaCy parse, biased towards words that appear early (PositionRank).
+
+    Candidates are the longest runs of NOUN/PROPN tokens within a sentence, filtered like pke's
+    defaults (no stopwords or punctuation, alphanumeric words of two or more characters, at most
+    five words). Nouns, proper nouns and adjectives are linked when they co-occur within `window`
+    tokens, and the word scores are found by power iteration with NumPy. A candidate scores the
+    sum of its words.
+    """
+
+    name = "positionrank"
+    candidate_pos = {'NOUN', 'PROPN'}
+    graph_pos = {'NOUN', 'PROPN', 'ADJ'}
+
+    def __init__(self, window=3, damping=0.85, max_iterations=50, tolerance=1e-6, max_words=5):
+        self.window = window
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.max_words = max_words
+
+    @staticmethod
+    def _valid_word(token):
+        word = token.text.replace('-', '')
+        return not (token.is_stop or token.is_punct) and len(word) >= 2 and word.isalnum()
+
+    def _candidates(self, doc):
+        """Returns {lemma tuple: (surface form, first token index)} in order of appearance."""
+        candidates = {}
+
+        def add(run):
+            if not run or len(run) > self.max_words or not all(self._valid_word(token) for token in run):
+                return
+            surface = " ".join(token.text for token in run).lower()
+            if len(surface) < 3:
+                return
+            key = tuple(token.lemma_.lower() for token in run)
+            if key not in candidates:
+                candidates[key] = (surface, run[0].i)
+
+        for sentence in doc.sents:
+            run = []
+            for token in sentence:
+                if token.pos_ in self.candidate_pos:
+                    run.append(token)
+                else:
+                    add(run)
+                    run = []
+            add(run)
+        return candidates
+
+    def _word_scores(self, doc):
+        vocabulary = {}
+        nodes = []
+        for token in doc:
+            if token.pos_ in self.graph_pos and self._valid_word(token):
+                nodes.append((vocabulary.setdefault(token.lemma_.lower(), len(vocabulary)), token.i))
+        if not vocabulary:
+            return vocabulary, np.zeros(0)
+
+        ids = np.array([node for node, _ in nodes], dtype=np.int64)
+        positions = np.array([position for _, position in nodes], dtype=np.int64)
+        sources, targets = [], []
+        for offset in range(1, self.window):
+            close = positions[offset:] - positions[:-offset] < self.window
+            sources.append(ids[:-offset][close])
+            targets.append(ids[offset:][close])
+        sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+        targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+        keep = sources != targets
+        sources, targets = np.concatenate([sources[keep], targets[keep]]), np.concatenate([targets[keep], sources[keep]])
+
+        size = len(vocabulary)
+        out_degree = np.bincount(sources, minlength=size).astype(np.float64)
+        teleport = np.bincount(ids, weights=1.0 / (positions + 1), minlength=size)
+        teleport /= teleport.sum()
+        scores = teleport.copy()
+        for _ in range(self.max_iterations):
+            flow = np.bincount(targets, weights=scores[sources] / out_degree[sources], minlength=size)
+            # Isolated words keep only their teleport share.
+            updated = (1 - self.damping) * teleport + self.damping * (flow + teleport * scores[out_degree == 0].sum())
+            converged = np.abs(updated - scores).sum() < self.tolerance
+            scores = updated
+            if converged:
+                break
+        return vocabulary, scores
+
+    def extract(self, text, doc, n=10):
+        candidates = self._candidates(doc)
+        if not candidates:
+            return []
+        vocabulary, word_scores = self._word_scores(doc)
+        ranked = sorted(
+            candidates.items(),
+            key=lambda item: (-sum(word_scores[vocabulary[word]] for word in item[0] if word in vocabulary), item[1][1]),
+        )
+        return [surface for _, (surface, _) in ranked[:n]]
+
+
+EXTRACTORS = {
+    MultipartiteRankExtractor.name: MultipartiteRankExtractor,
+    PositionRankExtractor.name: PositionRankExtractor,
+}
+
+
+def get_extractor(name):
+    if name not in EXTRACTORS:
+        raise ValueError("Unknown keyphrase extractor %r, expected one of %s" % (name, ", ".join(EXTRACTORS)))
+    return EXTRACTORS[name]()
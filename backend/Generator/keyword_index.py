@@ -0,0 +1,118 @@
+import re
+import threading
+from collections import deque
+
+# Same word characters as flashtext's default non-word boundaries.
+_TOKEN = re.compile(r"[A-Za-z0-9_]+|[^A-Za-z0-9_]")
+
+
+def tokenize(text):
+    """Splits text into lowercased (token, offset) pairs: runs of word characters, and every other
+    character on its own, so keywords only match on word boundaries."""
+    return [(match.group().lower(), match.start()) for match in _TOKEN.finditer(text)]
+
+
+class _Automaton:
+    """Aho–Corasick automaton over token sequences."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for token in pattern:
+                if token not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][token] = len(self.goto) - 1
+                state = self.goto[state][token]
+            self.output[state].append(pattern_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0) if state else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def matches(self, tokens):
+        """Yields (pattern id, index of the last matched token) for every occurrence, overlapping ones included."""
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            for pattern_id in self.output[state]:
+                yield pattern_id, position
+
+
+class DocumentKeywordIndex:
+    """Keyword -> (sentence id, character offset) postings over the sentences of one document.
+
+    Sentences are tokenized once. Keywords can be added in several calls; each call builds an
+    Aho–Corasick automaton over the new keywords only and scans the token lists once. Matching
+    is case-insensitive on word boundaries like flashtext, but every occurrence is recorded, also
+    when it overlaps a longer keyword. Sentences are ranked by length once up front and scanned
+    in that order, so postings are already longest-sentence-first and top-N queries need no sort.
+    """
+
+    def __init__(self, sentences):
+        self.sentences = list(sentences)
+        # Longest first; ties keep document order, like sorted(..., key=len, reverse=True).
+        self.ranking = sorted(range(len(self.sentences)), key=lambda i: -len(self.sentences[i]))
+        self._tokens = [[token.lower() for token in _TOKEN.findall(self.sentences[i])] for i in self.ranking]
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(keyword):
+        return tuple(token for token, _ in tokenize(keyword.strip()))
+
+    def add_keywords(self, keywords):
+        with self._lock:
+            new = list(dict.fromkeys(key for key in map(self.key, keywords) if key and key not in self._postings))
+            if not new:
+                return
+            for key in new:
+                self._postings[key] = []
+            automaton = _Automaton(new)
+            for tokens, sentence_id in zip(self._tokens, self.ranking):
+                offsets = None
+                for pattern_id, end in automaton.matches(tokens):
+                    if offsets is None:
+                        offsets = [match.start() for match in _TOKEN.finditer(self.sentences[sentence_id])]
+                    start = offsets[end - len(new[pattern_id]) + 1]
+                    self._postings[new[pattern_id]].append((sentence_id, start))
+
+    def postings(self, keyword):
+        """(sentence id, offset) of every occurrence, longest sentence first."""
+        self.add_keywords([keyword])
+        return list(self._postings.get(self.key(keyword), ()))
+
+    def top_sentences(self, keyword, n=None):
+        """The n longest distinct sentences containing keyword (all when n is None)."""
+        self.add_keywords([keyword])
+        sentence_ids = []
+        for sentence_id, _ in self._postings.get(self.key(keyword), ()):
+            if not sentence_ids or sentence_ids[-1] != sentence_id:
+                sentence_ids.append(sentence_id)
+                if n is not None and len(sentence_ids) >= n:
+                    break
+        return [self.sentences[i] for i in sentence_ids]
+
+    def keyword_sentences(self, keywords, n=None):
+        """find_sentences_with_keywords on the index: keyword -> its n longest sentences,
+        leaving out keywords that occur nowhere."""
+        self.add_keywords(keywords)
+        mapping = {}
+        for keyword in keywords:
+            sentences = self.top_sentences(keyword, n)
+            if sentences:
+                mapping[keyword.strip()] = sentences
+        return mapping
@@ -13,6 +13,8 @@ class LLMQuestionGenerator:
     def __init__(self):
         self.llm = None
         self._llm_lock = threading.Lock()
+        # The llama.cpp context is not thread-safe, so requests and jobs take turns on it.
+        self._inference_lock = threading.Lock()
 
     def _load_model(self):
         # First check: avoid lock overhead if already loaded
@@ -30,6 +32,10 @@ class LLMQuestionGenerator:
                     )
                     print("Qwen3-0.6B model loaded successfully.")
 
+    def _chat(self, **kwargs):
+        with self._inference_lock:
+            return self.llm.create_chat_completion(**kwargs)
+
     def _prepare_text(self, input_text, max_words=3000):
         """Prepare input text by truncating if necessary.
         With n_ctx=8192, ~3000 words leaves ample room for the prompt and response.
@@ -52,7 +58,7 @@ class LLMQuestionGenerator:
             f"/no_think"
         )
 
-        response = self.llm.create_chat_completion(
+        response = self._chat(
             messages=[
                 {
                     "role": "system",
@@ -92,7 +98,7 @@ class LLMQuestionGenerator:
             f"/no_think"
         )
 
-        response = self.llm.create_chat_completion(
+        response = self._chat(
             messages=[
                 {
                     "role": "system",
@@ -131,7 +137,7 @@ class LLMQuestionGenerator:
             f"/no_think"
         )
 
-        response = self.llm.create_chat_completion(
+        response = self._chat(
             messages=[
                 {
                     "role": "system",
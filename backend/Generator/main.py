@@ -1,20 +1,26 @@
+import threading
 import time
 import torch
 import random
 from transformers import T5ForConditionalGeneration, T5Tokenizer
 from transformers import AutoModelForSequenceClassification, AutoTokenizer,AutoModelForSeq2SeqLM, T5ForConditionalGeneration, T5Tokenizer
+from transformers import pipeline
+from transformers.modeling_outputs import BaseModelOutput
 import numpy as np
-import spacy
-from sense2vec import Sense2Vec
 from collections import OrderedDict
-from nltk import FreqDist
-from nltk.corpus import brown
 from similarity.normalized_levenshtein import NormalizedLevenshtein
-from Generator.mcq import tokenize_into_sentences, identify_keywords, find_sentences_with_keywords, generate_multiple_choice_questions, generate_normal_questions
-from Generator.encoding import beam_search_decoding
+from Generator.mcq import tokenize_into_sentences, generate_multiple_choice_questions, generate_normal_questions
+from Generator.encoding import beam_search_decoding, sampling_decoding, diverse_beam_decoding, chunk_prompts, chunked_beam_decoding
+from Generator.batching import length_buckets
+from Generator.document import DocumentAnalysis
+from Generator.distractors import DistractorEngine
+from Generator.keyphrases import get_extractor
+from Generator.retrieval import question_contexts
+from Generator.model_registry import ModelHandles, default_device, prepare_seq2seq
+from Generator import onnx_backend
+from Generator import config
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-import en_core_web_sm
 import json
 import re
 from typing import Any, List, Mapping, Tuple
@@ -26,15 +32,29 @@ import mammoth
 class MCQGenerator:
     
     def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained('t5-large')
-        self.model = T5ForConditionalGeneration.from_pretrained('Roasters/Question-Generator')
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.nlp = spacy.load('en_core_web_sm')
-        self.s2v = Sense2Vec().from_disk('s2v_old')
-        self.fdist = FreqDist(brown.words())
+        self.models = ModelHandles()
+        self.device = default_device()
+        self.tokenizer = self.models.t5_tokenizer('t5-large')
+        self.model = self.models.t5_model('Roasters/Question-Generator', self.device)
+        self.nlp = self.models.spacy_model('en_core_web_sm')
+        self.s2v = self.models.sense2vec('s2v_old')
+        self.fdist = self.models.brown_fdist()
+        self.keyphrase_extractor = get_extractor(config.KEYPHRASE_EXTRACTOR)
+        self.distractors = None
+        if config.DISTRACTOR_ENGINE:
+            self.distractors = self.models.shared(
+                "distractors", 's2v_old',
+                lambda: DistractorEngine(self.s2v, config.S2V_CACHE_DIR, os.path.join(config.S2V_CACHE_DIR, "neighbours"))
+            )
+        self.scheduler = None
+        if config.QG_BATCHING:
+            self.scheduler = self.models.batch_scheduler('Roasters/Question-Generator', self.tokenizer, self.model, self.device)
         self.normalized_levenshtein = NormalizedLevenshtein()
         self.set_seed(42)
+
+    def close(self):
+        """Releases this generator's references to shared models."""
+        self.models.release_all()
         
     def set_seed(self, seed):
         np.random.seed(seed)
@@ -42,7 +62,11 @@ class MCQGenerator:
         if torch.cuda.is_available():
             torch.cuda.manual_seed_all(seed)
             
-    def generate_mcq(self, payload):
+    def analyze(self, text):
+        """Returns a DocumentAnalysis that can be shared with the other generators."""
+        return DocumentAnalysis(text, self.nlp, self.s2v, self.fdist, self.normalized_levenshtein, self.keyphrase_extractor)
+
+    def generate_mcq(self, payload, analysis=None):
         start_time = time.time()
         inp = {
             "input_text": payload.get("input_text"),
@@ -50,14 +74,15 @@ class MCQGenerator:
         }
 
         text = inp['input_text']
-        sentences = tokenize_into_sentences(text)
-        modified_text = " ".join(sentences)
+        if analysis is None:
+            analysis = self.analyze(text)
+        modified_text = analysis.modified_text
 
-        keywords = identify_keywords(self.nlp, modified_text, inp['max_questions'], self.s2v, self.fdist, self.normalized_levenshtein, len(sentences))
-        keyword_sentence_mapping = find_sentences_with_keywords(keywords, sentences)
+        keywords = analysis.keywords(inp['max_questions'])
+        keyword_sentence_mapping = analysis.keyword_sentences(keywords, 3)
 
         for k in keyword_sentence_mapping.keys():
-            text_snippet = " ".join(keyword_sentence_mapping[k][:3])
+            text_snippet = " ".join(keyword_sentence_mapping[k])
             keyword_sentence_mapping[k] = text_snippet
 
         final_output = {}
@@ -66,7 +91,7 @@ class MCQGenerator:
             return final_output
         else:
             try:
-                generated_questions = generate_multiple_choice_questions(keyword_sentence_mapping, self.device, self.tokenizer, self.model, self.s2v, self.normalized_levenshtein)
+                generated_questions = generate_multiple_choice_questions(keyword_sentence_mapping, self.device, self.tokenizer, self.model, self.s2v, self.normalized_levenshtein, self.scheduler, self.distractors)
             except:
                 return final_output
 
@@ -84,15 +109,23 @@ class MCQGenerator:
 class ShortQGenerator:
     
     def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained('t5-large')
-        self.model = T5ForConditionalGeneration.from_pretrained('Roasters/Question-Generator')
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.nlp = spacy.load('en_core_web_sm')
-        self.s2v = Sense2Vec().from_disk('s2v_old')
-        self.fdist = FreqDist(brown.words())
+        self.models = ModelHandles()
+        self.device = default_device()
+        self.tokenizer = self.models.t5_tokenizer('t5-large')
+        self.model = self.models.t5_model('Roasters/Question-Generator', self.device)
+        self.nlp = self.models.spacy_model('en_core_web_sm')
+        self.s2v = self.models.sense2vec('s2v_old')
+        self.fdist = self.models.brown_fdist()
+        self.keyphrase_extractor = get_extractor(config.KEYPHRASE_EXTRACTOR)
+        self.scheduler = None
+        if config.QG_BATCHING:
+            self.scheduler = self.models.batch_scheduler('Roasters/Question-Generator', self.tokenizer, self.model, self.device)
         self.normalized_levenshtein = NormalizedLevenshtein()
         self.set_seed(42)
+
+    def close(self):
+        """Releases this generator's references to shared models."""
+        self.models.release_all()
         
     def set_seed(self, seed):
         np.random.seed(seed)
@@ -100,21 +133,26 @@ class ShortQGenerator:
         if torch.cuda.is_available():
             torch.cuda.manual_seed_all(seed)
             
-    def generate_shortq(self, payload):
+    def analyze(self, text):
+        """Returns a DocumentAnalysis that can be shared with the other generators."""
+        return DocumentAnalysis(text, self.nlp, self.s2v, self.fdist, self.normalized_levenshtein, self.keyphrase_extractor)
+
+    def generate_shortq(self, payload, analysis=None):
         inp = {
             "input_text": payload.get("input_text"),
             "max_questions": payload.get("max_questions", 4)
         }
 
         text = inp['input_text']
-        sentences = tokenize_into_sentences(text)
-        modified_text = " ".join(sentences)
+        if analysis is None:
+            analysis = self.analyze(text)
+        modified_text = analysis.modified_text
 
-        keywords = identify_keywords(self.nlp, modified_text, inp['max_questions'], self.s2v, self.fdist, self.normalized_levenshtein, len(sentences))
-        keyword_sentence_mapping = find_sentences_with_keywords(keywords, sentences)
+        keywords = analysis.keywords(inp['max_questions'])
+        keyword_sentence_mapping = analysis.keyword_sentences(keywords, 3)
         
         for k in keyword_sentence_mapping.keys():
-            text_snippet = " ".join(keyword_sentence_mapping[k][:3])
+            text_snippet = " ".join(keyword_sentence_mapping[k])
             keyword_sentence_mapping[k] = text_snippet
 
         final_output = {}
@@ -122,7 +160,7 @@ class ShortQGenerator:
         if len(keyword_sentence_mapping.keys()) == 0:
             return final_output
         else:
-            generated_questions = generate_normal_questions(keyword_sentence_mapping, self.device, self.tokenizer, self.model)
+            generated_questions = generate_normal_questions(keyword_sentence_mapping, self.device, self.tokenizer, self.model, self.scheduler)
 
         final_output["statement"] = modified_text
         final_output["questions"] = generated_questions["questions"]
@@ -135,11 +173,15 @@ class ShortQGenerator:
 class ParaphraseGenerator:
     
     def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained('t5-large')
-        self.model = T5ForConditionalGeneration.from_pretrained('Roasters/Question-Generator')
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+        self.models = ModelHandles()
+        self.device = default_device()
+        self.tokenizer = self.models.t5_tokenizer('t5-large')
+        self.model = self.models.t5_model('Roasters/Question-Generator', self.device)
         self.set_seed(42)
+
+    def close(self):
+        """Releases this generator's references to shared models."""
+        self.models.release_all()
         
     def set_seed(self, seed):
         np.random.seed(seed)
@@ -190,13 +232,20 @@ class ParaphraseGenerator:
         return output
 
 class BoolQGenerator:
+
+    DECODING_POLICIES = config.BOOLQ_DECODING_POLICIES
        
     def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained('t5-base')
-        self.model = T5ForConditionalGeneration.from_pretrained('Roasters/Boolean-Questions')
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+        self.models = ModelHandles()
+        self.device = default_device()
+        self.tokenizer = self.models.t5_tokenizer('t5-base')
+        self.model = self.models.t5_model('Roasters/Boolean-Questions', self.device)
+        self.decoding = config.BOOLQ_DECODING
         self.set_seed(42)
+
+    def close(self):
+        """Releases this generator's references to shared models."""
+        self.models.release_all()
         
     def set_seed(self, seed):
         np.random.seed(seed)
@@ -209,7 +258,30 @@ class BoolQGenerator:
         return bool(a)
     
 
-    def generate_boolq(self, payload):
+    def decode(self, sentences, modified_text, answer, num):
+        """Generates num questions with the decoding policy in self.decoding: "beam" (10 beams over
+        the whole passage), "sampling" (nucleus sampling), "diverse_beam" (one beam group per
+        question) or "chunks" (a shorter prompt per group of sentences, decoded as one batch).
+        """
+        if self.decoding == "chunks":
+            forms = ["truefalse: %s passage: %s </s>" % (chunk, answer) for chunk in chunk_prompts(sentences, num)]
+            if not forms:
+                return []
+            encoding = self.tokenizer(forms, padding=True, return_tensors="pt")
+        else:
+            form = "truefalse: %s passage: %s </s>" % (modified_text, answer)
+            encoding = self.tokenizer.encode_plus(form, return_tensors="pt")
+        input_ids, attention_masks = encoding["input_ids"].to(self.device), encoding["attention_mask"].to(self.device)
+
+        if self.decoding == "sampling":
+            return sampling_decoding(input_ids, attention_masks, self.model, self.tokenizer, num, config.BOOLQ_TOP_P)
+        if self.decoding == "diverse_beam":
+            return diverse_beam_decoding(input_ids, attention_masks, self.model, self.tokenizer, num)
+        if self.decoding == "chunks":
+            return chunked_beam_decoding(input_ids, attention_masks, self.model, self.tokenizer, num)
+        return beam_search_decoding(input_ids, attention_masks, self.model, self.tokenizer, num)
+
+    def generate_boolq(self, payload, analysis=None):
         start_time = time.time()
         inp = {
             "input_text": payload.get("input_text"),
@@ -218,15 +290,14 @@ class BoolQGenerator:
 
         text = inp['input_text']
         num= inp['max_questions']
-        sentences = tokenize_into_sentences(text)
-        modified_text = " ".join(sentences)
+        if analysis is not None:
+            sentences = analysis.sentences
+            modified_text = analysis.modified_text
+        else:
+            sentences = tokenize_into_sentences(text)
+            modified_text = " ".join(sentences)
         answer = self.random_choice()
-        form = "truefalse: %s passage: %s </s>" % (modified_text, answer)
-        print(form)
-        encoding = self.tokenizer.encode_plus(form, return_tensors="pt")
-        input_ids, attention_masks = encoding["input_ids"].to(self.device), encoding["attention_mask"].to(self.device)
-
-        output = beam_search_decoding (input_ids, attention_masks, self.model, self.tokenizer,num)
+        output = self.decode(sentences, modified_text, answer, int(num))
         if self.device.type == 'cuda':
             torch.cuda.empty_cache()
         
@@ -240,18 +311,35 @@ class BoolQGenerator:
 
 class AnswerPredictor:
           
-    def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained('t5-large', model_max_length=512)
-        self.model = T5ForConditionalGeneration.from_pretrained('Roasters/Answer-Predictor')
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+    def __init__(self, batch_size=None):
+        self.models = ModelHandles()
+        self.device = default_device()
+        self.batch_size = batch_size or config.ANSWER_BATCH_SIZE
+        self.tokenizer = self.models.t5_tokenizer('t5-large', model_max_length=512)
+        self.model = self.models.t5_model('Roasters/Answer-Predictor', self.device)
         
         # Load the lightweight NLI model for boolean question answering
         self.nli_model_name = "typeform/distilbert-base-uncased-mnli"
-        self.nli_tokenizer = AutoTokenizer.from_pretrained(self.nli_model_name)
-        self.nli_model = AutoModelForSequenceClassification.from_pretrained(self.nli_model_name)
+        self.nli_tokenizer = self.models.shared(
+            "tokenizer", self.nli_model_name, lambda: AutoTokenizer.from_pretrained(self.nli_model_name)
+        )
+        self.nli_model = self.models.shared(
+            "nli", self.nli_model_name, self._load_nli_model, self.device
+        )
         
         self.set_seed(42)
+
+    def _load_nli_model(self):
+        if onnx_backend.use_onnx(self.device):
+            return onnx_backend.load_classifier(self.nli_model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(self.nli_model_name)
+        model.to(self.device)
+        model.eval()
+        return model
+
+    def close(self):
+        """Releases this generator's references to shared models."""
+        self.models.release_all()
         
     def set_seed(self, seed):
         np.random.seed(seed)
@@ -264,54 +352,110 @@ class AnswerPredictor:
         Question = self.tokenizer.decode(greedy_output[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
         return Question.strip().capitalize()
 
-    def predict_answer(self, payload):
-        answers = []
-        inp = {
-                "input_text": payload.get("input_text"),
-                "input_question" : payload.get("input_question")
-            }
-        for ques in payload.get("input_question"):
-                
-            context = inp["input_text"]
-            question = ques
-            input_text = "question: %s <s> context: %s </s>" % (question, context)
-
-            encoding = self.tokenizer.encode_plus(input_text, return_tensors="pt")
-            input_ids, attention_masks = encoding["input_ids"].to(self.device), encoding["attention_mask"].to(self.device)
-            greedy_output = self.model.generate(input_ids=input_ids, attention_mask=attention_masks, max_length=256)
-            Question = self.tokenizer.decode(greedy_output[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
-            answers.append(Question.strip().capitalize())
+    @torch.inference_mode()
+    def encode_questions(self, contexts, questions):
+        """Token ids of "question: <q> <s> context: <c> </s>" for every question and its context.
+        Each distinct context is tokenized once and appended to its tokenized questions."""
+        context_ids = {context: self.tokenizer.encode(" <s> context: %s </s>" % context) for context in set(contexts)}
+        question_ids = self.tokenizer(["question: %s" % question for question in questions], add_special_tokens=False)["input_ids"]
+        return [ids + context_ids[context] for ids, context in zip(question_ids, contexts)]
+
+    @torch.inference_mode()
+    def answer_questions(self, context, questions, batch_size=None):
+        """Answers every question about context with the Answer-Predictor model, generating in
+        mini-batches of similar length. Long contexts are narrowed to each question's best windows
+        (see Generator.retrieval). Answers are returned in the order of questions."""
+        if not questions:
+            return []
+        batch_size = batch_size or self.batch_size
+        input_ids = self.encode_questions(question_contexts(context, questions), questions)
+        answers = [None] * len(input_ids)
+
+        for indices in length_buckets([len(ids) for ids in input_ids], batch_size):
+            batch = self.tokenizer.pad(
+                {"input_ids": [input_ids[i] for i in indices]},
+                padding="longest",
+                return_tensors="pt",
+            ).to(self.device)
+            outputs = self.model.generate(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"], max_length=256)
+            for index, output in zip(indices, outputs):
+                answer = self.tokenizer.decode(output, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+                answers[index] = answer.strip().capitalize()
 
         if self.device.type == 'cuda':
             torch.cuda.empty_cache()
 
         return answers
 
-    def predict_boolean_answer(self, payload):
-        input_text = payload.get("input_text", "")
-        input_questions = payload.get("input_question", [])
+    def predict_answer(self, payload):
+        return self.answer_questions(payload.get("input_text", ""), payload.get("input_question", []))
 
-        answers = []
+    @torch.inference_mode()
+    def score_entailment(self, context, hypotheses, batch_size=None):
+        """Scores every hypothesis against context with the NLI model. All (context, hypothesis)
+        pairs are tokenized in one call and run batch_size at a time on self.device. Long contexts
+        are narrowed to each hypothesis's best windows (see Generator.retrieval).
 
-        for question in input_questions:
-            hypothesis = question
-            inputs = self.nli_tokenizer.encode_plus(input_text, hypothesis, return_tensors="pt")
-            outputs = self.nli_model(**inputs)
-            logits = outputs.logits
-            probabilities = torch.softmax(logits, dim=1)
-            entailment_prob = probabilities[0][0].item()
-            contradiction_prob = probabilities[0][2].item()
-            
-            if entailment_prob > contradiction_prob:
-                answers.append(True)
-            else:
-                answers.append(False)
+        Returns (probabilities, answers): the [entailment, neutral, contradiction] probabilities of
+        each hypothesis, and whether its entailment probability beats its contradiction probability.
+        """
+        if not hypotheses:
+            return [], []
+        batch_size = batch_size or self.batch_size
+        encoded = self.nli_tokenizer(
+            question_contexts(context, hypotheses), list(hypotheses), padding=True, truncation="only_first", return_tensors="pt"
+        )
+        probabilities = []
+        for start in range(0, len(hypotheses), batch_size):
+            batch = {key: value[start:start + batch_size].to(self.device) for key, value in encoded.items()}
+            logits = self.nli_model(**batch).logits
+            probabilities.extend(torch.softmax(logits, dim=1).tolist())
 
         if self.device.type == 'cuda':
             torch.cuda.empty_cache()
 
+        answers = [scores[0] > scores[2] for scores in probabilities]
+        return probabilities, answers
+
+    def predict_boolean_answer(self, payload):
+        input_questions = payload.get("input_question", [])
+        if isinstance(input_questions, str):
+            input_questions = [input_questions]
+        _, answers = self.score_entailment(payload.get("input_text", ""), input_questions)
         return answers
 
+class QAPipeline:
+    """Extractive question answering with the default transformers "question-answering" pipeline."""
+
+    def __init__(self):
+        self.models = ModelHandles()
+        self.pipeline = self.models.shared(
+            "pipeline", "question-answering", lambda: pipeline("question-answering")
+        )
+
+    def __call__(self, **kwargs):
+        return self.pipeline(**kwargs)
+
+    def answer_questions(self, context, questions, batch_size=None):
+        """Runs the pipeline once over all questions about context, batch_size question/context
+        features at a time. Long contexts are narrowed to each question's best windows (see
+        Generator.retrieval). Returns one result dict per question, in order."""
+        if not questions:
+            return []
+        results = self.pipeline(
+            question=list(questions),
+            context=question_contexts(context, questions),
+            batch_size=batch_size or config.ANSWER_BATCH_SIZE,
+        )
+        # The pipeline unwraps the result of a single question.
+        if isinstance(results, dict):
+            results = [results]
+        return results
+
+    def close(self):
+        """Releases this pipeline's reference to the shared model."""
+        self.models.release_all()
+
 class GoogleDocsService:
     def __init__(self, service_account_file, scopes):
         self.credentials = service_account.Credentials.from_service_account_file(
@@ -393,21 +537,54 @@ class QuestionGenerator:
     by setting use_evaluator=False.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, batch_size: int = None, share_context_encoding: bool = None) -> None:
 
         QG_PRETRAINED = "iarfmoose/t5-base-question-generator"
         self.ANSWER_TOKEN = "<answer>"
         self.CONTEXT_TOKEN = "<context>"
         self.SEQ_LENGTH = 512
+        self.batch_size = batch_size or config.QUESTION_GENERATOR_BATCH_SIZE
+        if share_context_encoding is None:
+            share_context_encoding = config.QG_SHARED_CONTEXT_ENCODING
+        self.share_context_encoding = share_context_encoding
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = default_device()
+        self.models = ModelHandles()
 
-        self.qg_tokenizer = AutoTokenizer.from_pretrained(QG_PRETRAINED, use_fast=False)
-        self.qg_model = AutoModelForSeq2SeqLM.from_pretrained(QG_PRETRAINED)
-        self.qg_model.to(self.device)
-        self.qg_model.eval()
-
-        self.qa_evaluator = QAEvaluator()
+        self.qg_tokenizer = self.models.shared(
+            "tokenizer", QG_PRETRAINED, lambda: AutoTokenizer.from_pretrained(QG_PRETRAINED, use_fast=False)
+        )
+        self.qg_model = self.models.shared(
+            "seq2seq", QG_PRETRAINED, lambda: self._load_seq2seq(QG_PRETRAINED), self.device
+        )
+        self.nlp = self.models.spacy_model('en_core_web_sm')
+
+        self._qa_evaluator = None
+        self._qa_evaluator_lock = threading.Lock()
+
+    def _load_seq2seq(self, name: str) -> Any:
+        if onnx_backend.use_onnx(self.device):
+            return onnx_backend.load_seq2seq(name)
+        return prepare_seq2seq(AutoModelForSeq2SeqLM.from_pretrained(name), self.device)
+
+    @property
+    def qa_evaluator(self) -> "QAEvaluator":
+        """The evaluator is only needed when use_evaluator=True, so it is loaded on first use."""
+        if self._qa_evaluator is None:
+            with self._qa_evaluator_lock:
+                # Checked again, or concurrent requests would each build one and leak the
+                # registry references of all but the last.
+                if self._qa_evaluator is None:
+                    self._qa_evaluator = QAEvaluator()
+        return self._qa_evaluator
+
+    def close(self) -> None:
+        """Releases this generator's references to shared models."""
+        with self._qa_evaluator_lock:
+            if self._qa_evaluator is not None:
+                self._qa_evaluator.close()
+                self._qa_evaluator = None
+        self.models.release_all()
 
     def generate(
         self,
@@ -423,8 +600,12 @@ class QuestionGenerator:
 
         print("Generating questions...\n")
 
-        qg_inputs, qg_answers = self.generate_qg_inputs(article, answer_style)
-        generated_questions = self.generate_questions_from_inputs(qg_inputs)
+        if self.share_context_encoding:
+            qg_pairs, qg_answers = self.generate_qg_pairs(article, answer_style)
+            generated_questions = self.generate_questions_from_pairs(qg_pairs)
+        else:
+            qg_inputs, qg_answers = self.generate_qg_inputs(article, answer_style)
+            generated_questions = self.generate_questions_from_inputs(qg_inputs)
 
         message = "{} questions doesn't match {} answers".format(
             len(generated_questions), len(qg_answers)
@@ -433,10 +614,7 @@ class QuestionGenerator:
 
         if use_evaluator:
             print("Evaluating QA pairs...\n")
-            encoded_qa_pairs = self.qa_evaluator.encode_qa_pairs(
-                generated_questions, qg_answers
-            )
-            scores = self.qa_evaluator.get_scores(encoded_qa_pairs)
+            scores = self.qa_evaluator.score_qa_pairs(generated_questions, qg_answers)
 
             if num_questions:
                 qa_list = self._get_ranked_qa_pairs(
@@ -464,6 +642,16 @@ class QuestionGenerator:
         the answer is a string extracted from the text, and the context is the wider text surrounding
         the context.
         """
+        qg_pairs, answers = self.generate_qg_pairs(text, answer_style)
+        inputs = [self._format_qg_input(answer, context) for answer, context in qg_pairs]
+        return inputs, answers
+
+    def generate_qg_pairs(
+        self, text: str, answer_style: str
+    ) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Same as generate_qg_inputs, but returns (answer text, context) pairs instead of
+        concatenated model inputs, so that inputs sharing a context can be grouped.
+        """
 
         VALID_ANSWER_STYLES = ["all", "sentences", "multiple_choice"]
 
@@ -474,7 +662,7 @@ class QuestionGenerator:
                 )
             )
 
-        inputs = []
+        pairs = []
         answers = []
 
         if answer_style == "sentences" or answer_style == "all":
@@ -482,33 +670,123 @@ class QuestionGenerator:
 
             for segment in segments:
                 sentences = self._split_text(segment)
-                prepped_inputs, prepped_answers = self._prepare_qg_inputs(
+                prepped_pairs, prepped_answers = self._prepare_qg_pairs(
                     sentences, segment
                 )
-                inputs.extend(prepped_inputs)
+                pairs.extend(prepped_pairs)
                 answers.extend(prepped_answers)
 
         if answer_style == "multiple_choice" or answer_style == "all":
             sentences = self._split_text(text)
-            prepped_inputs, prepped_answers = self._prepare_qg_inputs_MC(sentences)
-            inputs.extend(prepped_inputs)
+            prepped_pairs, prepped_answers = self._prepare_qg_pairs_MC(sentences)
+            pairs.extend(prepped_pairs)
             answers.extend(prepped_answers)
 
-        return inputs, answers
+        return pairs, answers
 
-    def generate_questions_from_inputs(self, qg_inputs: List) -> List[str]:
+    def generate_questions_from_inputs(self, qg_inputs: List, batch_size: int = None) -> List[str]:
         """Given a list of concatenated answers and contexts, with the form:
         "answer_token <answer text> context_token <context text>", generates a list of
-        questions.
+        questions. Inputs are grouped into length-sorted batches of batch_size, each padded to its
+        longest input, and the questions are returned in the order of qg_inputs.
         """
-        generated_questions = []
+        batch_size = batch_size or self.batch_size
+
+        if batch_size <= 1:
+            return [self._generate_question(qg_input) for qg_input in qg_inputs]
+
+        encoded_inputs = self.qg_tokenizer(
+            qg_inputs, max_length=self.SEQ_LENGTH, truncation=True
+        )["input_ids"]
+        lengths = [len(ids) for ids in encoded_inputs]
+        generated_questions = [None] * len(qg_inputs)
+
+        for indices in length_buckets(lengths, batch_size):
+            questions = self._generate_question_batch([encoded_inputs[i] for i in indices])
+            for index, question in zip(indices, questions):
+                generated_questions[index] = question
+
+        return generated_questions
 
-        for qg_input in qg_inputs:
-            question = self._generate_question(qg_input)
-            generated_questions.append(question)
+    def generate_questions_from_pairs(
+        self, qg_pairs: List[Tuple[str, str]], batch_size: int = None
+    ) -> List[str]:
+        """Generates a question for each (answer text, context) pair, encoding every distinct
+        context only once. The context and the answer are run through the encoder separately and
+        their hidden states are concatenated, so this is an approximation of encoding the joint
+        "answer_token <answer text> context_token <context text>" input: answer tokens do not
+        attend to the context. Questions are returned in the order of qg_pairs.
+        """
+        batch_size = batch_size or self.batch_size
+        pairs_by_context = OrderedDict()
+        for index, (answer, context) in enumerate(qg_pairs):
+            pairs_by_context.setdefault(context, []).append((index, answer))
+
+        generated_questions = [None] * len(qg_pairs)
+
+        for context, indexed_answers in pairs_by_context.items():
+            context_states = self._encode_context(context)
+            for start in range(0, len(indexed_answers), batch_size):
+                batch = indexed_answers[start:start + batch_size]
+                questions = self._generate_question_batch_with_context(
+                    [answer for _, answer in batch], context_states
+                )
+                for (index, _), question in zip(batch, questions):
+                    generated_questions[index] = question
 
         return generated_questions
 
+    @torch.no_grad()
+    def _encode_context(self, context: str) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Runs "context_token <context text>" through the encoder once. Returns the hidden states
+        and attention mask, both with a batch dimension of 1.
+        """
+        encoded_context = self.qg_tokenizer(
+            f"{self.CONTEXT_TOKEN} {context}",
+            max_length=self.SEQ_LENGTH,
+            truncation=True,
+            return_tensors="pt",
+        ).to(self.device)
+        encoder_output = self.qg_model.get_encoder()(
+            input_ids=encoded_context["input_ids"],
+            attention_mask=encoded_context["attention_mask"],
+        )
+        return encoder_output.last_hidden_state, encoded_context["attention_mask"]
+
+    @torch.no_grad()
+    def _generate_question_batch_with_context(
+        self, answers: List[str], context_states: Tuple[torch.Tensor, torch.Tensor]
+    ) -> List[str]:
+        """Encodes a batch of "answer_token <answer text>" prefixes and generates questions with the
+        cached context hidden states appended to each of them.
+        """
+        hidden_states, context_mask = context_states
+        encoded_answers = self.qg_tokenizer(
+            [f"{self.ANSWER_TOKEN} {answer}" for answer in answers],
+            add_special_tokens=False,
+            padding="longest",
+            max_length=self.SEQ_LENGTH,
+            truncation=True,
+            return_tensors="pt",
+        ).to(self.device)
+        answer_states = self.qg_model.get_encoder()(
+            input_ids=encoded_answers["input_ids"],
+            attention_mask=encoded_answers["attention_mask"],
+        ).last_hidden_state
+
+        batch_size = len(answers)
+        encoder_states = torch.cat(
+            [answer_states, hidden_states.expand(batch_size, -1, -1)], dim=1
+        )
+        attention_mask = torch.cat(
+            [encoded_answers["attention_mask"], context_mask.expand(batch_size, -1)], dim=1
+        )
+        output = self.qg_model.generate(
+            encoder_outputs=BaseModelOutput(last_hidden_state=encoder_states),
+            attention_mask=attention_mask,
+        )
+        return self.qg_tokenizer.batch_decode(output, skip_special_tokens=True)
+
     def _split_text(self, text: str) -> List[str]:
         """Splits the text into sentences, and attempts to split or truncate long sentences."""
         MAX_SENTENCE_LEN = 128
@@ -546,21 +824,33 @@ class QuestionGenerator:
 
         return [self.qg_tokenizer.decode(s, skip_special_tokens=True) for s in segments]
 
+    def _format_qg_input(self, answer: str, context: str) -> str:
+        return f"{self.ANSWER_TOKEN} {answer} {self.CONTEXT_TOKEN} {context}"
+
     def _prepare_qg_inputs(
         self, sentences: List[str], text: str
     ) -> Tuple[List[str], List[str]]:
         """Uses sentences as answers and the text as context. Returns a tuple of (model inputs, answers).
         Model inputs are "answer_token <answer text> context_token <context text>"
         """
-        inputs = []
+        pairs, answers = self._prepare_qg_pairs(sentences, text)
+        inputs = [self._format_qg_input(answer, context) for answer, context in pairs]
+        return inputs, answers
+
+    def _prepare_qg_pairs(
+        self, sentences: List[str], text: str
+    ) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Uses sentences as answers and the text as context. Returns a tuple of
+        ((answer text, context) pairs, answers).
+        """
+        pairs = []
         answers = []
 
         for sentence in sentences:
-            qg_input = f"{self.ANSWER_TOKEN} {sentence} {self.CONTEXT_TOKEN} {text}"
-            inputs.append(qg_input)
+            pairs.append((sentence, text))
             answers.append(sentence)
 
-        return inputs, answers
+        return pairs, answers
 
     def _prepare_qg_inputs_MC(
         self, sentences: List[str]
@@ -569,9 +859,18 @@ class QuestionGenerator:
         questions. Sentences are used as context, and entities as answers. Returns a tuple of (model inputs, answers).
         Model inputs are "answer_token <answer text> context_token <context text>"
         """
-        spacy_nlp = en_core_web_sm.load()
-        docs = list(spacy_nlp.pipe(sentences, disable=["parser"]))
-        inputs_from_text = []
+        pairs, answers = self._prepare_qg_pairs_MC(sentences)
+        inputs = [self._format_qg_input(answer, context) for answer, context in pairs]
+        return inputs, answers
+
+    def _prepare_qg_pairs_MC(
+        self, sentences: List[str]
+    ) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Performs NER on the sentences and pairs each entity with the sentence it was found in.
+        Returns a tuple of ((answer text, context) pairs, multiple-choice answers).
+        """
+        docs = list(self.nlp.pipe(sentences, disable=["parser"]))
+        pairs_from_text = []
         answers_from_text = []
 
         for doc, sentence in zip(docs, sentences):
@@ -579,14 +878,11 @@ class QuestionGenerator:
             if entities:
 
                 for entity in entities:
-                    qg_input = (
-                        f"{self.ANSWER_TOKEN} {entity} {self.CONTEXT_TOKEN} {sentence}"
-                    )
                     answers = self._get_MC_answers(entity, docs)
-                    inputs_from_text.append(qg_input)
+                    pairs_from_text.append((entity.text, sentence))
                     answers_from_text.append(answers)
 
-        return inputs_from_text, answers_from_text
+        return pairs_from_text, answers_from_text
 
     def _get_MC_answers(
         self, correct_answer: Any, docs: Any
@@ -643,6 +939,20 @@ class QuestionGenerator:
         question = self.qg_tokenizer.decode(output[0], skip_special_tokens=True)
         return question
 
+    @torch.no_grad()
+    def _generate_question_batch(self, input_ids: List[List[int]]) -> List[str]:
+        """Takes a batch of tokenized qg_inputs, pads them to the longest input and generates a
+        question for each of them.
+        """
+        encoded_batch = self.qg_tokenizer.pad(
+            {"input_ids": input_ids}, padding="longest", return_tensors="pt"
+        ).to(self.device)
+        output = self.qg_model.generate(
+            input_ids=encoded_batch["input_ids"],
+            attention_mask=encoded_batch["attention_mask"],
+        )
+        return self.qg_tokenizer.batch_decode(output, skip_special_tokens=True)
+
     def _encode_qg_input(self, qg_input: str) -> torch.tensor:
         """Tokenizes a string and returns a tensor of input ids corresponding to indices of tokens in
         the vocab.
@@ -701,19 +1011,33 @@ class QAEvaluator:
     QA pairs.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, batch_size: int = None) -> None:
 
         QAE_PRETRAINED = "iarfmoose/bert-base-cased-qa-evaluator"
         self.SEQ_LENGTH = 512
+        self.batch_size = batch_size or config.QA_EVALUATOR_BATCH_SIZE
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = default_device()
+        self.models = ModelHandles()
 
-        self.qae_tokenizer = AutoTokenizer.from_pretrained(QAE_PRETRAINED)
-        self.qae_model = AutoModelForSequenceClassification.from_pretrained(
-            QAE_PRETRAINED
+        self.qae_tokenizer = self.models.shared(
+            "tokenizer", QAE_PRETRAINED, lambda: AutoTokenizer.from_pretrained(QAE_PRETRAINED)
         )
-        self.qae_model.to(self.device)
-        self.qae_model.eval()
+        self.qae_model = self.models.shared(
+            "classifier", QAE_PRETRAINED, lambda: self._load_classifier(QAE_PRETRAINED), self.device
+        )
+
+    def _load_classifier(self, name: str) -> Any:
+        if onnx_backend.use_onnx(self.device):
+            return onnx_backend.load_classifier(name)
+        model = AutoModelForSequenceClassification.from_pretrained(name)
+        model.to(self.device)
+        model.eval()
+        return model
+
+    def close(self) -> None:
+        """Releases this evaluator's references to shared models."""
+        self.models.release_all()
 
     def encode_qa_pairs(
         self, questions: List[str], answers: List[str]
@@ -741,16 +1065,57 @@ class QAEvaluator:
             k for k, v in sorted(scores.items(), key=lambda item: item[1], reverse=True)
         ]
 
-    def _encode_qa(self, question: str, answer: str) -> torch.tensor:
-        """Concatenates a question and answer, and then tokenizes them. Returns a tensor of
-        input ids corresponding to indices in the vocab.
+    def score_qa_pairs(
+        self, questions: List[str], answers: List[str], batch_size: int = None
+    ) -> List[int]:
+        """Batched equivalent of encode_qa_pairs followed by get_scores. All pairs are tokenized
+        in one call, then scored in length-sorted mini-batches padded to their longest pair.
+        Returns the pair indices ranked from best to worst.
         """
+        batch_size = batch_size or self.batch_size
+        correct_answers = [self._get_correct_answer(answer) for answer in answers]
+        if not questions:
+            return []
+
+        encoded = self.qae_tokenizer(
+            text=list(questions),
+            text_pair=correct_answers,
+            max_length=self.SEQ_LENGTH,
+            truncation=True,
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        scores = [0.0] * len(lengths)
+
+        for indices in length_buckets(lengths, batch_size):
+            batch = self.qae_tokenizer.pad(
+                {key: [encoded[key][i] for i in indices] for key in encoded.keys()},
+                padding="longest",
+                return_tensors="pt",
+            ).to(self.device)
+            batch_scores = self._evaluate_qa_batch(batch)
+            for index, score in zip(indices, batch_scores):
+                scores[index] = score
+
+        if self.device.type == 'cuda':
+            torch.cuda.empty_cache()
+
+        return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+
+    def _get_correct_answer(self, answer: Any) -> str:
+        """Multiple-choice answers are lists of options; returns the text of the correct one."""
         if type(answer) is list:
             for a in answer:
                 if a["correct"]:
                     correct_answer = a["answer"]
         else:
             correct_answer = answer
+        return correct_answer
+
+    def _encode_qa(self, question: str, answer: str) -> torch.tensor:
+        """Concatenates a question and answer, and then tokenizes them. Returns a tensor of
+        input ids corresponding to indices in the vocab.
+        """
+        correct_answer = self._get_correct_answer(answer)
 
         return self.qae_tokenizer(
             text=question,
@@ -767,6 +1132,12 @@ class QAEvaluator:
         output = self.qae_model(**encoded_qa_pair)
         return output[0][0][1]
 
+    @torch.no_grad()
+    def _evaluate_qa_batch(self, encoded_qa_pairs: Mapping[str, torch.tensor]) -> List[float]:
+        """Takes a padded batch of encoded QA pairs and returns one score per pair."""
+        output = self.qae_model(**encoded_qa_pairs)
+        return output[0][:, 1].tolist()
+
 
 def print_qa(qa_list: List[Mapping[str, str]], show_answers: bool = True) -> None:
     """Formats and prints a list of generated questions and answers."""
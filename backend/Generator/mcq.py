@@ -1,13 +1,17 @@
 import string
+from collections import Counter
 import nltk
 import pke
-import torch
 from nltk.tokenize import sent_tokenize
 from flashtext import KeywordProcessor
 from nltk.corpus import stopwords
 from sense2vec import Sense2Vec
 from similarity.normalized_levenshtein import NormalizedLevenshtein
 
+from Generator import config
+from Generator.batching import generate_in_length_buckets
+from Generator.concurrency import in_generator_pool
+
 nltk.download('brown')
 nltk.download('stopwords')
 nltk.download('popular')
@@ -20,36 +24,95 @@ def is_word_available(word, s2v_model):
     else:
         return False
 
-def generate_word_variations(word):
-    letters = 'abcdefghijklmnopqrstuvwxyz ' + string.punctuation
-    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
-    deletes = [L + R[1:] for L, R in splits if R]
-    transposes = [L + R[1] + R[0] + R[2:] for L, R in splits if len(R) > 1]
-    replaces = [L + c + R[1:] for L, R in splits if R for c in letters]
-    inserts = [L + c + R for L, R in splits for c in letters]
-    return set(deletes + transposes + replaces + inserts)
+def within_edit_distance_one(a, b):
+    """True if b can be made from a with at most one insertion, deletion, substitution or
+    transposition of adjacent characters.
+    """
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > 1:
+        return False
+    if a == b:
+        return True
+    if len_a > len_b:
+        a, b = b, a
+        len_a, len_b = len_b, len_a
+
+    i = 0
+    while i < len_a and a[i] == b[i]:
+        i += 1
+
+    if len_a == len_b:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < len_a and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+def singularize(phrase):
+    """Crude singular form of the last word of a phrase, used to match plural variants."""
+    if len(phrase) > 4 and phrase.endswith("ies"):
+        return phrase[:-3] + "y"
+    if len(phrase) > 4 and phrase.endswith("es") and phrase[:-2].endswith(("s", "x", "z", "ch", "sh")):
+        return phrase[:-2]
+    if len(phrase) > 3 and phrase.endswith("s") and not phrase.endswith("ss"):
+        return phrase[:-1]
+    return phrase
+
+class NearDuplicateFilter:
+    """Rejects phrases that are case, punctuation, plural or single-edit variants of a phrase
+    that was already accepted.
+    """
+
+    def __init__(self, phrases=()):
+        self._normalized = []
+        self._canonical = set()
+        for phrase in phrases:
+            self.add(phrase)
+
+    _punctuation = str.maketrans("_", " ", string.punctuation.replace("_", ""))
+
+    @staticmethod
+    def normalize(phrase):
+        return " ".join(phrase.translate(NearDuplicateFilter._punctuation).lower().split())
+
+    @staticmethod
+    def canonical(normalized):
+        return singularize(normalized).replace(" ", "")
+
+    def is_duplicate(self, phrase):
+        normalized = self.normalize(phrase)
+        if self.canonical(normalized) in self._canonical:
+            return True
+        return any(within_edit_distance_one(normalized, seen) for seen in self._normalized)
+
+    def add(self, phrase):
+        normalized = self.normalize(phrase)
+        self._normalized.append(normalized)
+        self._canonical.add(self.canonical(normalized))
+
+    def accept(self, phrase):
+        """Adds phrase and returns True unless it is a near duplicate of an accepted phrase."""
+        if self.is_duplicate(phrase):
+            return False
+        self.add(phrase)
+        return True
 
 def find_similar_words(word, s2v_model):
-    output = []
-    word_preprocessed = word.translate(word.maketrans("", "", string.punctuation))
-    word_preprocessed = word_preprocessed.lower()
-
-    word_variations = generate_word_variations(word_preprocessed)
-
-    word = word.replace(" ", "_")
-
-    sense = s2v_model.get_best_sense(word)
+    sense = s2v_model.get_best_sense(word.replace(" ", "_"))
     most_similar = s2v_model.most_similar(sense, n=15)
+    return filter_similar_words(word, most_similar)
+
+def filter_similar_words(word, most_similar):
+    """Turns sense2vec neighbours of word into distractors, dropping variants of word itself."""
+    output = []
+    word_preprocessed = NearDuplicateFilter.normalize(word)
+    near_duplicates = NearDuplicateFilter([word_preprocessed])
 
-    compare_list = [word_preprocessed]
     for each_word in most_similar:
         append_word = each_word[0].split("|")[0].replace("_", " ")
         append_word = append_word.strip()
-        append_word_processed = append_word.lower()
-        append_word_processed = append_word_processed.translate(word.maketrans("", "", string.punctuation))
-        if append_word_processed not in compare_list and word_preprocessed not in append_word_processed and append_word_processed not in word_variations:
+        append_word_processed = NearDuplicateFilter.normalize(append_word)
+        if word_preprocessed not in append_word_processed and near_duplicates.accept(append_word_processed):
             output.append(append_word.title())
-            compare_list.append(append_word_processed)
 
     out = list(dict.fromkeys(output))
     return out
@@ -100,13 +163,89 @@ def are_words_distant(words_list, current_word, threshold, normalized_levenshtei
     score_list = [normalized_levenshtein.distance(word.lower(), current_word.lower()) for word in words_list]
     return min(score_list) >= threshold
 
-def filter_useful_phrases(phrase_keys, max_count, normalized_levenshtein):
+class DistantPhraseIndex:
+    """Accepted phrases bucketed by length, answering are_words_distant(accepted, phrase, threshold)
+    without running the quadratic Levenshtein table against every accepted phrase.
+
+    The edit distance is at least the length difference and at least the character bag distance,
+    so buckets and phrases those bounds already put at the threshold are skipped. The remaining
+    pairs are measured exactly with Myers' bit-parallel algorithm, one integer operation per
+    character. Results are identical to the exhaustive scan with normalized_levenshtein.
+    """
+
+    def __init__(self, normalized_levenshtein, threshold=0.7):
+        self.normalized_levenshtein = normalized_levenshtein
+        self.threshold = threshold
+        self._buckets = {}
+
+    def add(self, phrase):
+        lower = phrase.lower()
+        masks = {}
+        for i, char in enumerate(lower):
+            masks[char] = masks.get(char, 0) | (1 << i)
+        self._buckets.setdefault(len(lower), []).append((lower, Counter(lower), masks))
+
+    @staticmethod
+    def _levenshtein(masks, length, text):
+        """Edit distance between the phrase described by masks/length and text (Myers, 1999)."""
+        full = (1 << length) - 1
+        last = 1 << (length - 1)
+        positive, negative, score = full, 0, length
+        for char in text:
+            equal = masks.get(char, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & full)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & last:
+                score += 1
+            elif horizontal_negative & last:
+                score -= 1
+            horizontal_positive = ((horizontal_positive << 1) | 1) & full
+            horizontal_negative = (horizontal_negative << 1) & full
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+            negative = horizontal_positive & vertical
+        return score
+
+    def is_distant(self, phrase):
+        lower = phrase.lower()
+        length = len(lower)
+        counts = None
+        for other_length, bucket in self._buckets.items():
+            # Empty strings skip the shortcuts: strsim's Levenshtein scores "x" against "" as 0.
+            if not (length and other_length):
+                if any(self.normalized_levenshtein.distance(other, lower) < self.threshold for other, _, _ in bucket):
+                    return False
+                continue
+            longest = max(length, other_length)
+            if abs(length - other_length) / longest >= self.threshold:
+                continue
+            if counts is None:
+                counts = Counter(lower)
+            for other, other_counts, masks in bucket:
+                bag_distance = max(sum((counts - other_counts).values()), sum((other_counts - counts).values()))
+                if bag_distance / longest >= self.threshold:
+                    continue
+                if other == lower or self._levenshtein(masks, other_length, lower) / longest < self.threshold:
+                    return False
+        return True
+
+def filter_useful_phrases(phrase_keys, max_count, normalized_levenshtein, near_duplicates=None):
     filtered_phrases = []
     if phrase_keys:
         filtered_phrases.append(phrase_keys[0])
+        distant_phrases = DistantPhraseIndex(normalized_levenshtein, 0.7)
+        distant_phrases.add(phrase_keys[0])
+        if near_duplicates is not None:
+            near_duplicates.add(phrase_keys[0])
         for ph in phrase_keys[1:]:
-            if are_words_distant(filtered_phrases, ph, 0.7, normalized_levenshtein):
+            if near_duplicates is not None and near_duplicates.is_duplicate(ph):
+                continue
+            if distant_phrases.is_distant(ph):
                 filtered_phrases.append(ph)
+                distant_phrases.add(ph)
+                if near_duplicates is not None:
+                    near_duplicates.add(ph)
             if len(filtered_phrases) >= max_count:
                 break
     return filtered_phrases
@@ -147,13 +286,18 @@ def extract_phrases_from_doc(doc):
 
 def identify_keywords(nlp_model, text, max_keywords, s2v_model, fdist, normalized_levenshtein, num_sentences):
     doc = nlp_model(text)
-    max_keywords = int(max_keywords)
 
     keywords = extract_noun_phrases(text)
     keywords = sorted(keywords, key=lambda x: fdist[x])
-    keywords = filter_useful_phrases(keywords, max_keywords, normalized_levenshtein)
 
     phrase_keys = extract_phrases_from_doc(doc)
+
+    return select_keywords(keywords, phrase_keys, max_keywords, lambda answer: is_word_available(answer, s2v_model), normalized_levenshtein, num_sentences)
+
+def select_keywords(keywords, phrase_keys, max_keywords, is_available, normalized_levenshtein, num_sentences):
+    max_keywords = int(max_keywords)
+
+    keywords = filter_useful_phrases(keywords, max_keywords, normalized_levenshtein)
     filtered_phrases = filter_useful_phrases(phrase_keys, max_keywords, normalized_levenshtein)
 
     total_phrases = keywords + filtered_phrases
@@ -162,13 +306,29 @@ def identify_keywords(nlp_model, text, max_keywords, s2v_model, fdist, normalize
 
     answers = []
     for answer in total_phrases_filtered:
-        if answer not in answers and is_word_available(answer, s2v_model):
+        if answer not in answers and is_available(answer):
             answers.append(answer)
 
     answers = answers[:max_keywords]
     return answers
 
-def generate_multiple_choice_questions(keyword_sent_mapping, device, tokenizer, model, sense2vec_model, normalized_levenshtein):
+def run_question_generation(batch_text, device, tokenizer, model, scheduler=None):
+    # GeneratorPool workers decode themselves: the scheduler thread runs with the process-wide
+    # torch thread count and would oversubscribe the cores the pool partitioned.
+    if scheduler is not None and not in_generator_pool():
+        return scheduler.generate(batch_text)
+
+    return generate_in_length_buckets(
+        model,
+        tokenizer,
+        batch_text,
+        device,
+        max_length=150,
+        max_batch_size=config.QG_MAX_BATCH_SIZE,
+        max_pad_ratio=config.QG_MAX_PAD_RATIO,
+    )
+
+def generate_multiple_choice_questions(keyword_sent_mapping, device, tokenizer, model, sense2vec_model, normalized_levenshtein, scheduler=None, distractor_engine=None):
     batch_text = []
     answers = keyword_sent_mapping.keys()
     for answer in answers:
@@ -177,23 +337,20 @@ def generate_multiple_choice_questions(keyword_sent_mapping, device, tokenizer,
         text = context + " " + "answer: " + answer + " </s>"
         batch_text.append(text)
 
-    encoding = tokenizer.batch_encode_plus(batch_text, pad_to_max_length=True, return_tensors="pt")
-
     print("Generating questions using the model...")
-    input_ids, attention_masks = encoding["input_ids"].to(device), encoding["attention_mask"].to(device)
+    decoded_questions = run_question_generation(batch_text, device, tokenizer, model, scheduler)
 
-    with torch.no_grad():
-        outputs = model.generate(input_ids=input_ids,
-                                 attention_mask=attention_masks,
-                                 max_length=150)
+    if distractor_engine is not None:
+        answer_choices = distractor_engine.answer_choices(list(answers))
+    else:
+        answer_choices = [get_answer_choices(answer, sense2vec_model) for answer in answers]
 
     generated_questions = []
     for index, answer in enumerate(answers):
-        out = outputs[index, :]
-        decoded_question = tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        decoded_question = decoded_questions[index]
 
         question_statement = decoded_question.replace("question:", "").strip()
-        options, options_algorithm = get_answer_choices(answer, sense2vec_model)
+        options, options_algorithm = answer_choices[index]
         options = filter_useful_phrases(options, 10, normalized_levenshtein)
         extra_options = options[3:]
         options = options[:3]
@@ -213,7 +370,7 @@ def generate_multiple_choice_questions(keyword_sent_mapping, device, tokenizer,
 
     return {"questions": generated_questions}
 
-def generate_normal_questions(keyword_sent_mapping, device, tokenizer, model):
+def generate_normal_questions(keyword_sent_mapping, device, tokenizer, model, scheduler=None):
     batch_text = []
     answers = keyword_sent_mapping.keys()
     
@@ -223,22 +380,14 @@ def generate_normal_questions(keyword_sent_mapping, device, tokenizer, model):
         text = context + " " + "answer: " + answer + " </s>"
         batch_text.append(text)
 
-    encoding = tokenizer.batch_encode_plus(batch_text, pad_to_max_length=True, return_tensors="pt")
-
     print("Running model for generation...")
-    input_ids, attention_masks = encoding["input_ids"].to(device), encoding["attention_mask"].to(device)
-
-    with torch.no_grad():
-        outs = model.generate(input_ids=input_ids,
-                              attention_mask=attention_masks,
-                              max_length=150)
+    decoded_questions = run_question_generation(batch_text, device, tokenizer, model, scheduler)
 
     output_array = {"questions": []}
 
     for index, val in enumerate(answers):
         individual_quest = {}
-        out = outs[index, :]
-        dec = tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        dec = decoded_questions[index]
         
         Question = dec.replace('question:', '')
         Question = Question.strip()
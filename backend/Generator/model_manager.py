@@ -0,0 +1,155 @@
+import contextlib
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+
+from Generator.model_registry import registry
+
+
+class ModelManager:
+    """Loads generators on first use and keeps them in least-recently-used order. When the
+    registry's resident size goes over budget_bytes, the least recently used idle generators are
+    closed so their shared weights can be freed. A budget of 0 disables eviction.
+
+    Request handlers take generators with use(), which counts them as in use until the block
+    exits. Generators in use are not evicted for the budget, and an explicit evict() of one only
+    closes it once its last user is done.
+    """
+
+    def __init__(self, budget_bytes=0):
+        self.budget_bytes = budget_bytes
+        self._factories = {}
+        self._loaded = OrderedDict()
+        self._footprints = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._users = {}
+        self._evicted = {}
+        self.counters = {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+        self._load_locks[name] = threading.Lock()
+
+    def names(self):
+        return list(self._factories)
+
+    def get(self, name):
+        """Returns the named generator, loading it (and evicting others) if needed. The caller is
+        not counted as a user, so prefer use() while running requests on it."""
+        return self._get(name, use=False)
+
+    @contextlib.contextmanager
+    def use(self, name):
+        """Context manager that yields the named generator and keeps it from being closed until
+        the block exits."""
+        instance = self._get(name, use=True)
+        try:
+            yield instance
+        finally:
+            self._release(instance)
+
+    def _hit(self, name, use):
+        """Returns the loaded instance, counting a user if asked. Called with the lock held."""
+        instance = self._loaded.get(name)
+        if instance is not None:
+            self._loaded.move_to_end(name)
+            self.counters["hits"] += 1
+            if use:
+                self._users[id(instance)] = self._users.get(id(instance), 0) + 1
+        return instance
+
+    def _get(self, name, use):
+        if name not in self._factories:
+            raise ValueError("Unknown model %r, expected one of %s" % (name, ", ".join(self._factories)))
+        with self._lock:
+            instance = self._hit(name, use)
+            if instance is not None:
+                return instance
+
+        with self._load_locks[name]:
+            with self._lock:
+                instance = self._hit(name, use)
+                if instance is not None:
+                    return instance
+
+            start = time.time()
+            resident_before = registry.resident_bytes()
+            print(f"Loading model '{name}'...")
+            instance = self._factories[name]()
+
+            with self._lock:
+                self._loaded[name] = instance
+                if use:
+                    self._users[id(instance)] = self._users.get(id(instance), 0) + 1
+                self._footprints[name] = max(registry.resident_bytes() - resident_before, 0)
+                self.counters["loads"] += 1
+                self.counters["load_seconds"] += time.time() - start
+            self._evict_over_budget(keep=name)
+            return instance
+
+    def _release(self, instance):
+        with self._lock:
+            key = id(instance)
+            self._users[key] -= 1
+            if self._users[key] > 0:
+                return
+            del self._users[key]
+            evicted = self._evicted.pop(key, None)
+        if evicted is not None:
+            self._close(*evicted)
+
+    def evict(self, name):
+        """Removes the named generator. It is closed now, or when its last user is done."""
+        with self._lock:
+            instance = self._loaded.pop(name, None)
+            if instance is None:
+                return False
+            self.counters["evictions"] += 1
+            if self._users.get(id(instance)):
+                self._evicted[id(instance)] = (name, instance)
+                print(f"Evicting model '{name}' once its requests finish")
+                return True
+        self._close(name, instance)
+        return True
+
+    def _close(self, name, instance):
+        print(f"Closing model '{name}'")
+        if hasattr(instance, "close"):
+            instance.close()
+        del instance
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _evict_over_budget(self, keep):
+        if not self.budget_bytes:
+            return
+        while registry.resident_bytes() > self.budget_bytes:
+            with self._lock:
+                # Generators in use keep their memory until released, so evicting them would not help.
+                candidates = [
+                    name for name, instance in self._loaded.items()
+                    if name != keep and not self._users.get(id(instance))
+                ]
+            if not candidates:
+                break
+            self.evict(candidates[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._loaded.keys()),
+                "in_use": {
+                    name: self._users[id(instance)]
+                    for name, instance in self._loaded.items() if self._users.get(id(instance))
+                },
+                "closing": [name for name, _ in self._evicted.values()],
+                "footprint_bytes": dict(self._footprints),
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": registry.resident_bytes(),
+                "counters": dict(self.counters),
+            }
@@ -0,0 +1,235 @@
+import os
+import threading
+
+import torch
+import spacy
+from sense2vec import Sense2Vec
+from nltk import FreqDist
+from nltk.corpus import brown
+from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+from Generator import config
+from Generator.batching import BatchScheduler
+from Generator import onnx_backend
+from Generator.s2v_store import MmapSense2Vec
+from Generator.word_freq import CompactFreqDist
+
+
+def current_rss_bytes():
+    """Returns the resident set size of this process in bytes (0 if it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _state_nbytes(value, seen):
+    if isinstance(value, torch.Tensor):
+        key = (value.data_ptr(), value.dtype)
+        if key in seen:
+            return 0
+        seen.add(key)
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_state_nbytes(item, seen) for item in value)
+    return 0
+
+
+def estimate_nbytes(obj):
+    """Approximate footprint of a loaded model object. Torch modules are measured from their state
+    dict (tied weights counted once, int8 packed weights included), sense2vec tables from their
+    vector data. Returns None when the object cannot be measured directly, in which case the RSS
+    delta of the load is used instead.
+    """
+    if isinstance(obj, torch.nn.Module):
+        seen = set()
+        return sum(_state_nbytes(value, seen) for value in obj.state_dict().values())
+    if isinstance(obj, Sense2Vec):
+        return obj.vectors.data.nbytes
+    if isinstance(obj, (MmapSense2Vec, CompactFreqDist)):
+        # Mapped pages live in the shared page cache, not in this process's private memory.
+        return 0
+    if isinstance(getattr(obj, "model", None), torch.nn.Module):
+        return estimate_nbytes(obj.model)
+    return None
+
+
+class _Entry:
+    def __init__(self, close=None):
+        self.obj = None
+        self.nbytes = 0
+        self.close = close
+        self.refcount = 0
+        self.error = None
+        # Set once obj is loaded, or error is set if loading failed.
+        self.ready = threading.Event()
+
+
+class ModelRegistry:
+    """Process-wide store of loaded models. Instances are keyed by (kind, model id, device) and
+    handed out with a reference count, so generators that use the same weights share one copy.
+    An entry is dropped once the last holder releases it. Models load outside the registry lock:
+    callers of the key being loaded wait for it, all other keys stay available.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.RLock()
+        self.saved_bytes = 0
+
+    @staticmethod
+    def make_key(kind, model_id, device=None):
+        return (kind, model_id, str(device) if device is not None else "cpu")
+
+    def acquire(self, kind, model_id, loader, device=None, close=None):
+        """Returns the shared instance for the key, calling loader() to create it on first use.
+        close(obj) is called when the last reference is released.
+        """
+        key = self.make_key(kind, model_id, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            loading = entry is None
+            if loading:
+                entry = _Entry(close)
+                self._entries[key] = entry
+            entry.refcount += 1
+
+        if loading:
+            try:
+                rss_before = current_rss_bytes()
+                obj = loader()
+                nbytes = estimate_nbytes(obj)
+                if nbytes is None:
+                    # Approximate when other models load at the same time.
+                    nbytes = max(current_rss_bytes() - rss_before, 0)
+            except BaseException as e:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                entry.error = e
+                entry.ready.set()
+                raise
+            entry.obj, entry.nbytes = obj, nbytes
+            entry.ready.set()
+            return obj
+
+        entry.ready.wait()
+        if entry.error is not None:
+            raise entry.error
+        with self._lock:
+            self.saved_bytes += entry.nbytes
+        return entry.obj
+
+    def release(self, kind, model_id, device=None):
+        """Drops one reference to the key, unloading the instance when none are left."""
+        key = self.make_key(kind, model_id, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount -= 1
+            if entry.refcount <= 0:
+                del self._entries[key]
+                if entry.close is not None:
+                    entry.close(entry.obj)
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": {
+                    "/".join(key): {"refcount": entry.refcount, "bytes": entry.nbytes, "loading": not entry.ready.is_set()}
+                    for key, entry in self._entries.items()
+                },
+                "resident_bytes": sum(entry.nbytes for entry in self._entries.values()),
+                "saved_bytes": self.saved_bytes,
+            }
+
+
+registry = ModelRegistry()
+
+
+def default_device():
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of the Linear layers, in place. Weights are stored as int8 and
+    activations are quantized on the fly, which speeds up CPU inference and shrinks the model."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def prepare_seq2seq(model, device):
+    """Moves a loaded seq2seq model to device for inference, quantizing it when EDUAID_QUANTIZE_INT8
+    is set and the device is the CPU (the quantized kernels are CPU only)."""
+    model.to(device)
+    model.eval()
+    if config.QUANTIZE_INT8 and torch.device(device).type == "cpu":
+        model = quantize_int8(model)
+    return model
+
+
+class ModelHandles:
+    """Tracks the registry keys acquired by one generator so they can be released together."""
+
+    def __init__(self):
+        self._keys = []
+
+    def _acquire(self, kind, model_id, loader, device=None, close=None):
+        obj = registry.acquire(kind, model_id, loader, device, close)
+        self._keys.append((kind, model_id, device))
+        return obj
+
+    def t5_tokenizer(self, name, **kwargs):
+        model_id = name if not kwargs else "%s%s" % (name, sorted(kwargs.items()))
+        return self._acquire("tokenizer", model_id, lambda: T5Tokenizer.from_pretrained(name, **kwargs))
+
+    def t5_model(self, name, device):
+        if onnx_backend.use_onnx(device):
+            return self._acquire("t5", name, lambda: onnx_backend.load_seq2seq(name), device)
+
+        def load():
+            return prepare_seq2seq(T5ForConditionalGeneration.from_pretrained(name), device)
+        return self._acquire("t5", name, load, device)
+
+    def spacy_model(self, name='en_core_web_sm'):
+        return self._acquire("spacy", name, lambda: spacy.load(name))
+
+    def sense2vec(self, path='s2v_old'):
+        if MmapSense2Vec.exists(config.S2V_STORE):
+            return self._acquire("sense2vec", config.S2V_STORE, lambda: MmapSense2Vec(config.S2V_STORE))
+        return self._acquire("sense2vec", path, lambda: Sense2Vec().from_disk(path))
+
+    def brown_fdist(self):
+        if CompactFreqDist.exists(config.BROWN_FREQ_PATH):
+            return self._acquire("fdist", config.BROWN_FREQ_PATH, lambda: CompactFreqDist(config.BROWN_FREQ_PATH))
+        return self._acquire("fdist", "brown", lambda: FreqDist(brown.words()))
+
+    def shared(self, kind, model_id, loader, device=None, close=None):
+        """Acquires an arbitrary shared object, for models without a dedicated helper."""
+        return self._acquire(kind, model_id, loader, device, close)
+
+    def batch_scheduler(self, model_id, tokenizer, model, device):
+        """Shared BatchScheduler in front of a question generation model."""
+        return self._acquire(
+            "scheduler",
+            model_id,
+            lambda: BatchScheduler(
+                model,
+                tokenizer,
+                device,
+                max_batch_size=config.QG_MAX_BATCH_SIZE,
+                max_wait_ms=config.QG_BATCH_WINDOW_MS,
+                max_pad_ratio=config.QG_MAX_PAD_RATIO,
+            ),
+            device,
+            lambda scheduler: scheduler.close(),
+        )
+
+    def release_all(self):
+        while self._keys:
+            registry.release(*self._keys.pop())
@@ -0,0 +1,101 @@
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+
+from Generator import config
+
+# Models converted by `python -m Generator.onnx_backend`; the registry loaders pick the ONNX
+# versions when EDUAID_INFERENCE_BACKEND=onnx.
+SEQ2SEQ_MODELS = [
+    "Roasters/Question-Generator",
+    "Roasters/Boolean-Questions",
+    "Roasters/Answer-Predictor",
+    "iarfmoose/t5-base-question-generator",
+]
+CLASSIFIER_MODELS = [
+    "iarfmoose/bert-base-cased-qa-evaluator",
+    "typeform/distilbert-base-uncased-mnli",
+]
+
+PROVIDER = "CPUExecutionProvider"
+
+_export_lock = threading.Lock()
+
+
+def _optimum():
+    try:
+        from optimum import onnxruntime
+    except ImportError as e:
+        raise RuntimeError(
+            "The ONNX backend needs optimum and onnxruntime: pip install 'optimum[onnxruntime]'"
+        ) from e
+    return onnxruntime
+
+
+def export_path(name, onnx_dir=None):
+    return os.path.join(onnx_dir or config.ONNX_DIR, name.replace("/", "--"))
+
+
+def _load(model_class, name, onnx_dir=None, **kwargs):
+    """Loads the exported model, exporting and saving it first when it is not on disk yet.
+
+    The export is written to a temporary directory next to the final one and renamed into place,
+    so an interrupted export never leaves a directory that looks complete.
+    """
+    path = export_path(name, onnx_dir)
+    with _export_lock:
+        if os.path.exists(os.path.join(path, "config.json")):
+            return model_class.from_pretrained(path, provider=PROVIDER, **kwargs)
+        print(f"Exporting {name} to ONNX in {path}...")
+        model = model_class.from_pretrained(name, export=True, provider=PROVIDER, **kwargs)
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", dir=parent)
+        try:
+            model.save_pretrained(staging)
+            if os.path.exists(path) and not os.path.exists(os.path.join(path, "config.json")):
+                # Left behind by an export that was interrupted before the rename.
+                shutil.rmtree(path)
+            try:
+                os.replace(staging, path)
+            except OSError:
+                # Another process finished the same export first; keep its copy.
+                if not os.path.exists(os.path.join(path, "config.json")):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return model
+
+
+def load_seq2seq(name, onnx_dir=None):
+    """ORTModelForSeq2SeqLM with separate encoder, decoder and decoder-with-past sessions. It
+    exposes the same generate() as the PyTorch model."""
+    return _load(_optimum().ORTModelForSeq2SeqLM, name, onnx_dir, use_cache=True)
+
+
+def load_classifier(name, onnx_dir=None):
+    """ORTModelForSequenceClassification, called like the PyTorch model and returning logits."""
+    return _load(_optimum().ORTModelForSequenceClassification, name, onnx_dir)
+
+
+def use_onnx(device):
+    """Whether models for device should be loaded through ONNX Runtime (CPU only)."""
+    return config.INFERENCE_BACKEND == "onnx" and str(device).startswith("cpu")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Generator models to ONNX.")
+    parser.add_argument("--onnx-dir", default=config.ONNX_DIR, help="output directory")
+    parser.add_argument("--models", nargs="+", default=SEQ2SEQ_MODELS + CLASSIFIER_MODELS, help="models to export")
+    args = parser.parse_args()
+
+    for name in args.models:
+        load = load_classifier if name in CLASSIFIER_MODELS else load_seq2seq
+        load(name, args.onnx_dir)
+        print(f"{name} -> {export_path(name, args.onnx_dir)}")
+
+
+if __name__ == "__main__":
+    main()
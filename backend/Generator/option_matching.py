@@ -0,0 +1,31 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def best_options(answers, options):
+    """For each question, the index of the option most similar to its generated answer, or None
+    when the question has no options.
+
+    answers[i] is the answer generated for question i and options[i] its list of options. One TF-IDF
+    vectorizer is fitted over all options and answers of the request; rows stay sparse and
+    L2-normalized, so the cosine similarity of every option to its question's answer is a single
+    element-wise sparse product summed per row. Ties go to the first option.
+    """
+    counts = np.array([len(question_options) for question_options in options], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    documents = [option for question_options in options for option in question_options] + list(answers)
+    try:
+        matrix = TfidfVectorizer().fit_transform(documents).tocsr()
+    except ValueError:
+        # Empty vocabulary: nothing to compare, so every option scores zero.
+        similarities = np.zeros(offsets[-1])
+    else:
+        owners = np.repeat(np.arange(len(answers)), counts)
+        option_rows = matrix[:offsets[-1]]
+        answer_rows = matrix[offsets[-1]:][owners]
+        similarities = np.asarray(option_rows.multiply(answer_rows).sum(axis=1)).ravel()
+
+    return [
+        int(np.argmax(similarities[start:end])) if end > start else None
+        for start, end in zip(offsets[:-1], offsets[1:])
+    ]
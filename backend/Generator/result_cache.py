@@ -0,0 +1,132 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Collapses whitespace so that re-pasted copies of the same text share a cache key."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+class ResultCache:
+    """Two-tier cache for generated results: an in-process LRU in front of a SQLite table.
+
+    Entries expire after ttl_seconds. The memory tier holds at most memory_entries results and the
+    disk tier at most disk_entries, evicting the least recently used first. Values must be JSON
+    serializable.
+    """
+
+    def __init__(self, path, model_version, memory_entries=256, disk_entries=10000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.model_version = model_version
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            self._db.commit()
+
+    def make_key(self, endpoint, input_text, params):
+        """Hashes the normalized input text, endpoint, generation parameters and model version."""
+        payload = json.dumps(
+            {
+                "endpoint": endpoint,
+                "input_text": normalize_text(input_text),
+                "params": params,
+                "model_version": self.model_version,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.metrics["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self.metrics["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.metrics["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.metrics["expired"] += 1
+
+            self.metrics["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.metrics["sets"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now),
+                )
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                overflow = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.disk_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM results WHERE key IN "
+                        "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.metrics["evictions"] += overflow
+                self._db.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return stats
@@ -0,0 +1,114 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from Generator import config
+
+_WORD = re.compile(r"\S+")
+_TERM = re.compile(r"[a-z0-9]+")
+
+
+def terms(text):
+    """Lowercased alphanumeric terms of text, as indexed by BM25Index."""
+    return _TERM.findall(text.lower())
+
+
+def window_ranges(text, window_words, stride_words):
+    """(start, end) character ranges of windows of window_words whitespace-separated words,
+    starting every stride_words words, so consecutive windows overlap by window_words -
+    stride_words words. The last window always reaches the end of the text."""
+    spans = [match.span() for match in _WORD.finditer(text)]
+    if not spans:
+        return []
+    window_words = max(1, window_words)
+    stride_words = max(1, min(stride_words, window_words))
+    starts = list(range(0, max(len(spans) - window_words, 0) + 1, stride_words))
+    if starts[-1] + window_words < len(spans):
+        starts.append(len(spans) - window_words)
+    return [(spans[start][0], spans[min(start + window_words, len(spans)) - 1][1]) for start in starts]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, with an inverted index of term frequencies so a
+    query only touches the documents that contain its terms."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        lengths = []
+        for doc_id, document in enumerate(documents):
+            counts = Counter(terms(document))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, count))
+        self.lengths = np.array(lengths, dtype=np.float64)
+        self.avg_length = self.lengths.mean() if len(lengths) else 0.0
+        n = len(lengths)
+        self.idf = {
+            term: math.log(1.0 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def scores(self, query):
+        """BM25 score of every document for query."""
+        scores = np.zeros(len(self.lengths))
+        if not len(self.lengths) or not self.avg_length:
+            return scores
+        norm = self.k1 * (1.0 - self.b + self.b * self.lengths / self.avg_length)
+        for term in set(terms(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            doc_ids, counts = zip(*posting)
+            doc_ids = np.array(doc_ids)
+            counts = np.array(counts, dtype=np.float64)
+            scores[doc_ids] += self.idf[term] * counts * (self.k1 + 1.0) / (counts + norm[doc_ids])
+        return scores
+
+    def top_k(self, query, k):
+        """Indices of the k best scoring documents, best first. Ties go to the earlier document."""
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        return [int(i) for i in np.lexsort((np.arange(len(scores)), -scores))[:k]]
+
+
+class WindowRetriever:
+    """Indexes a long text as overlapping windows and returns, per question, its top_k windows by
+    BM25 in document order, so a reader only sees a bounded amount of context. Overlapping
+    selected windows are merged rather than repeated."""
+
+    def __init__(self, text, window_words=None, stride_words=None, top_k=None):
+        self.text = text
+        self.window_words = window_words or config.ANSWER_WINDOW_WORDS
+        self.stride_words = stride_words or config.ANSWER_WINDOW_STRIDE
+        self.top_k = top_k or config.ANSWER_TOP_WINDOWS
+        self.ranges = window_ranges(text, self.window_words, self.stride_words)
+        self.index = BM25Index([text[start:end] for start, end in self.ranges])
+
+    def context(self, question):
+        merged = []
+        for start, end in sorted(self.ranges[i] for i in self.index.top_k(question, self.top_k)):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return " ".join(self.text[start:end] for start, end in merged)
+
+
+def question_contexts(text, questions):
+    """The context each question should be answered from: text itself when it has at most
+    EDUAID_ANSWER_RETRIEVAL_MIN_WORDS words (or retrieval is disabled), otherwise the question's
+    best windows of text."""
+    min_words = config.ANSWER_RETRIEVAL_MIN_WORDS
+    if min_words <= 0 or not text or len(_WORD.findall(text)) <= min_words:
+        return [text] * len(questions)
+    retriever = WindowRetriever(text)
+    return [retriever.context(question) for question in questions]
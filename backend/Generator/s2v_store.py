@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from Generator.sorted_keys import SortedKeys, sort_keys, write_sorted_keys
+
+
+def top_k_rows(vectors, queries, k, block_size=262144):
+    """Finds the k rows of vectors with the highest dot product against each query. Rows are
+    scanned in blocks, so vectors can be a memory-mapped array larger than RAM. Returns
+    (rows, scores) arrays of shape (len(queries), k), best first.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+
+    for start in range(0, vectors.shape[0], block_size):
+        scores = queries @ vectors[start:start + block_size].T
+        m = min(k, scores.shape[1])
+        top = np.argpartition(-scores, m - 1, axis=1)[:, :m]
+        best_rows = np.concatenate([best_rows, top + start], axis=1)
+        best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+
+        if best_rows.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+class MmapSense2Vec:
+    """Read-only sense2vec table backed by memory-mapped files, built by `python -m Generator.s2v_store`.
+
+    The directory holds keys sorted by their UTF-8 bytes (see Generator.sorted_keys), the
+    L2-normalized vectors and frequencies in the same order, and meta.json. A key's row is found
+    by binary search, so no per-process key table is built and every worker that maps the files
+    shares the same page-cache pages. Implements the get_best_sense / most_similar / get_freq
+    subset of the Sense2Vec API used by Generator.mcq.
+    """
+
+    def __init__(self, path, block_size=262144):
+        self.path = path
+        self.block_size = block_size
+        with open(os.path.join(path, "meta.json")) as f:
+            self.cfg = json.load(f)
+        self.senses = self.cfg["senses"]
+        self.keys = SortedKeys(path)
+        self.row = self.keys.find
+        self.key = self.keys.key
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.freqs = np.load(os.path.join(path, "freqs.npy"), mmap_mode="r")
+
+    @staticmethod
+    def exists(path):
+        return bool(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def __contains__(self, key):
+        return self.row(key) is not None
+
+    @staticmethod
+    def make_key(word, sense):
+        return re.sub(r"\s", "_", word) + "|" + sense
+
+    def get_freq(self, key, default=None):
+        row = self.row(key)
+        if row is None or self.freqs[row] < 0:
+            return default
+        return int(self.freqs[row])
+
+    def get_best_sense(self, word, senses=tuple(), ignore_case=True):
+        sense_options = senses or self.senses
+        if not sense_options:
+            return None
+        versions = [word, word.upper(), word.title()] if ignore_case else [word]
+        freqs = []
+        for text in versions:
+            for sense in sense_options:
+                key = self.make_key(text, sense)
+                if key in self:
+                    freqs.append((self.get_freq(key, -1), key))
+        return max(freqs)[1] if freqs else None
+
+    def most_similar(self, keys, n=10, batch_size=16):
+        if isinstance(keys, str):
+            keys = [keys]
+        rows = []
+        for key in keys:
+            row = self.row(key)
+            if row is None:
+                raise ValueError(f"Can't find key {key} in table")
+            rows.append(row)
+
+        query = np.asarray(self.vectors[rows], dtype=np.float32).mean(axis=0, keepdims=True)
+        query /= max(np.linalg.norm(query), 1e-12)
+        best_rows, best_scores = top_k_rows(self.vectors, query, n + len(rows), self.block_size)
+        return [
+            (self.key(row), float(score))
+            for row, score in zip(best_rows[0], best_scores[0])
+            if row not in rows
+        ][:n]
+
+
+def convert(s2v_path, output_path, block_size=262144):
+    """Writes the on-disk format read by MmapSense2Vec from a sense2vec model directory."""
+    from sense2vec import Sense2Vec
+
+    s2v = Sense2Vec().from_disk(s2v_path)
+    data = s2v.vectors.data
+    entries = {s2v.strings[key]: row for key, row in s2v.vectors.key2row.items()}
+    keys = sort_keys(entries)
+    write_sorted_keys(output_path, keys)
+    np.save(os.path.join(output_path, "freqs.npy"), np.array([s2v.get_freq(key, -1) for key in keys], dtype=np.int64))
+
+    source_rows = np.array([entries[key] for key in keys], dtype=np.int64)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(output_path, "vectors.npy"), mode="w+", dtype=np.float32, shape=(len(keys), data.shape[1])
+    )
+    for start in range(0, len(keys), block_size):
+        block = np.asarray(data[source_rows[start:start + block_size]], dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        vectors[start:start + block_size] = block / norms
+    vectors.flush()
+
+    with open(os.path.join(output_path, "meta.json"), "w") as f:
+        json.dump({"senses": list(s2v.senses), "source": os.path.abspath(s2v_path), "rows": len(keys)}, f)
+    return len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a sense2vec model to the memory-mapped store format.")
+    parser.add_argument("s2v_path", nargs="?", default="s2v_old", help="sense2vec model directory")
+    parser.add_argument("output_path", nargs="?", default="s2v_mmap", help="output directory")
+    args = parser.parse_args()
+    rows = convert(args.s2v_path, args.output_path)
+    print(f"Wrote {rows} keys to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import functools
+import os
+
+import numpy as np
+
+
+def write_sorted_keys(path, keys):
+    """Writes keys, already sorted by their UTF-8 bytes, as keys.npy (one byte blob) and
+    offsets.npy (start of every key plus the total length) under path.
+    """
+    encoded = [key.encode("utf-8") for key in keys]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(key) for key in encoded], out=offsets[1:])
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    np.save(os.path.join(path, "keys.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def sort_keys(keys):
+    """Sorts strings in the byte order SortedKeys searches in."""
+    return sorted(keys, key=lambda key: key.encode("utf-8"))
+
+
+class SortedKeys:
+    """Memory-mapped sorted string table written by write_sorted_keys. find() binary searches
+    the mapped bytes, so no per-process dict is built and forked workers share the pages.
+    """
+
+    def __init__(self, path, cache_size=65536):
+        self.key_bytes = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.find = functools.lru_cache(maxsize=cache_size)(self._find)
+
+    def __len__(self):
+        return self.offsets.shape[0] - 1
+
+    def _raw(self, index):
+        return bytes(self.key_bytes[self.offsets[index]:self.offsets[index + 1]])
+
+    def key(self, index):
+        return self._raw(index).decode("utf-8")
+
+    def _find(self, key):
+        """Returns the index of key, or None when it is not in the table."""
+        target = key.encode("utf-8")
+        low, high = 0, len(self) - 1
+        while low <= high:
+            mid = (low + high) // 2
+            candidate = self._raw(mid)
+            if candidate == target:
+                return mid
+            if candidate < target:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return None
@@ -0,0 +1,62 @@
+import argparse
+import os
+
+import numpy as np
+
+from Generator.sorted_keys import SortedKeys, sort_keys, write_sorted_keys
+
+
+class CompactFreqDist:
+    """Read-only word frequency table written by `python -m Generator.word_freq`.
+
+    Words are stored sorted (see Generator.sorted_keys) next to a counts array, both
+    memory-mapped, so loading takes milliseconds and all generators and worker processes share
+    one copy. Lookups behave like nltk's FreqDist: unknown words count 0.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = SortedKeys(path)
+        self.counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+
+    @staticmethod
+    def exists(path):
+        return bool(path) and os.path.exists(os.path.join(path, "counts.npy"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, word):
+        return self.keys.find(word) is not None
+
+    def __getitem__(self, word):
+        index = self.keys.find(word)
+        return 0 if index is None else int(self.counts[index])
+
+    def N(self):
+        return int(np.sum(self.counts))
+
+
+def build(words, output_path):
+    """Counts words and writes the table read by CompactFreqDist. Returns the number of distinct words."""
+    from nltk import FreqDist
+
+    fdist = FreqDist(words)
+    keys = sort_keys(fdist)
+    write_sorted_keys(output_path, keys)
+    np.save(os.path.join(output_path, "counts.npy"), np.array([fdist[key] for key in keys], dtype=np.int64))
+    return len(keys)
+
+
+def main():
+    from nltk.corpus import brown
+
+    parser = argparse.ArgumentParser(description="Write the Brown corpus word frequencies as a compact table.")
+    parser.add_argument("output_path", nargs="?", default="brown_freq", help="output directory")
+    args = parser.parse_args()
+    count = build(brown.words(), args.output_path)
+    print(f"Wrote {count} words to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Per-question answering versus one batched call per context.
+
+Answers a fixed set of questions about the sample article with the extractive QA pipeline
+(/get_shortq_answer) and the Answer-Predictor T5 model (AnswerPredictor.predict_answer), first one
+question at a time as before and then with answer_questions. Reports the time per question and
+whether the answers are identical.
+
+Run from the backend folder:
+    python -m benchmarks.batched_answers
+    python -m benchmarks.batched_answers --models qa --questions 30 --batch-size 8
+"""
+import argparse
+import time
+
+from benchmarks.sample_texts import SAMPLE_QUESTIONS as QUESTIONS, load_text
+from Generator.main import AnswerPredictor, QAPipeline
+
+
+def qa_loop(model, context, questions):
+    return [model(question=question, context=context)["answer"] for question in questions]
+
+
+def qa_batched(model, context, questions, batch_size):
+    return [result["answer"] for result in model.answer_questions(context, questions, batch_size)]
+
+
+def t5_loop(model, context, questions):
+    return [answer for question in questions for answer in model.answer_questions(context, [question], 1)]
+
+
+def t5_batched(model, context, questions, batch_size):
+    return model.answer_questions(context, questions, batch_size)
+
+
+MODELS = {
+    "qa": (QAPipeline, qa_loop, qa_batched),
+    "t5": (AnswerPredictor, t5_loop, t5_batched),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', nargs='+', default=sorted(MODELS), choices=sorted(MODELS))
+    parser.add_argument('--questions', type=int, default=20, help='Questions per context')
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    context = load_text()
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    for key in args.models:
+        factory, loop, batched = MODELS[key]
+        model = factory()
+        try:
+            start = time.perf_counter()
+            expected = loop(model, context, questions)
+            loop_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            answers = batched(model, context, questions, args.batch_size)
+            batched_time = time.perf_counter() - start
+        finally:
+            model.close()
+
+        same = sum(a == b for a, b in zip(expected, answers))
+        print(f"{key:<3} per question {loop_time / len(questions) * 1000:7.1f} ms, "
+              f"batched {batched_time / len(questions) * 1000:7.1f} ms "
+              f"({loop_time / batched_time:.1f}x), {same}/{len(questions)} identical answers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Latency and diversity of the EDUAID_BOOLQ_DECODING policies of the boolean question generator.
+
+Each policy generates questions for every sample passage with the same BoolQGenerator. Reports the
+mean latency per request, the share of distinct questions and the mean pairwise normalized
+Levenshtein distance between the questions of a request (higher is more diverse).
+
+Run from the backend folder:
+    python -m benchmarks.boolq_decoding
+    python -m benchmarks.boolq_decoding --policies beam chunks --questions 8 --verbose
+"""
+import argparse
+import itertools
+import time
+
+from similarity.normalized_levenshtein import NormalizedLevenshtein
+
+from benchmarks.sample_texts import SAMPLE_TEXTS, load_text
+from Generator.main import BoolQGenerator
+
+
+def diversity(questions, normalized_levenshtein):
+    pairs = list(itertools.combinations(questions, 2))
+    if not pairs:
+        return 0.0
+    return sum(normalized_levenshtein.distance(a, b) for a, b in pairs) / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--policies', nargs='+', default=list(BoolQGenerator.DECODING_POLICIES),
+                        choices=BoolQGenerator.DECODING_POLICIES)
+    parser.add_argument('--questions', type=int, default=4, help='max_questions per request')
+    parser.add_argument('--text', help='Passage file to use instead of the sample texts')
+    parser.add_argument('--verbose', action='store_true', help='Print the generated questions')
+    args = parser.parse_args()
+
+    texts = [load_text(args.text)] if args.text else SAMPLE_TEXTS
+    normalized_levenshtein = NormalizedLevenshtein()
+    generator = BoolQGenerator()
+    try:
+        for policy in args.policies:
+            generator.decoding = policy
+            generator.set_seed(42)
+            elapsed = 0.0
+            generated = distinct = 0
+            scores = []
+            for text in texts:
+                start = time.perf_counter()
+                questions = generator.generate_boolq({"input_text": text, "max_questions": args.questions})["Boolean_Questions"]
+                elapsed += time.perf_counter() - start
+                generated += len(questions)
+                distinct += len(set(questions))
+                scores.append(diversity(questions, normalized_levenshtein))
+                if args.verbose:
+                    for question in questions:
+                        print(f"  [{policy}] {question}")
+            print(f"{policy:<13} {elapsed / len(texts) * 1000:8.0f} ms/request, "
+                  f"{distinct / max(generated, 1):5.0%} distinct, diversity {sum(scores) / len(scores):.3f}")
+    finally:
+        generator.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Startup cost of the Brown corpus frequency table.
+
+Compares counting brown.words() into an nltk FreqDist, as the MCQ and short-answer generators
+did on every boot, with opening the precomputed CompactFreqDist table. Also checks that both
+give the same counts for every word of the sample texts and times those lookups.
+
+Run from the backend folder:
+    python -m benchmarks.brown_freq
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from nltk import FreqDist
+from nltk.corpus import brown
+
+from benchmarks.sample_texts import load_text
+from Generator.word_freq import CompactFreqDist, build
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default=None, help='Existing table to load (built into a temp dir if omitted)')
+    parser.add_argument('--text', default=None, help='Text file whose words are looked up')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fdist = FreqDist(brown.words())
+    counting = time.perf_counter() - start
+    print(f"FreqDist(brown.words())  {counting * 1000:9.1f} ms, {len(fdist)} words")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if not CompactFreqDist.exists(path):
+            path = os.path.join(tmp, "brown_freq")
+            start = time.perf_counter()
+            build(brown.words(), path)
+            print(f"build table (one time)   {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+        start = time.perf_counter()
+        table = CompactFreqDist(path)
+        loading = time.perf_counter() - start
+        print(f"CompactFreqDist(path)    {loading * 1000:9.1f} ms, {len(table)} words")
+
+        words = re.findall(r"[\w'-]+", load_text(args.text))
+        for name, freqs in [("FreqDist", fdist), ("CompactFreqDist", table)]:
+            start = time.perf_counter()
+            counts = [freqs[word] for word in words]
+            print(f"{name + ' lookups':<24} {(time.perf_counter() - start) * 1e6 / len(words):9.2f} us/word")
+        mismatches = sum(fdist[word] != table[word] for word in words)
+        print(f"{mismatches} mismatching counts over {len(words)} words, startup {counting / max(loading, 1e-9):.0f}x faster")
+
+
+if __name__ == '__main__':
+    main()
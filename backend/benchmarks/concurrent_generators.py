@@ -0,0 +1,96 @@
+"""Compares sequential and concurrent execution of the three /get_problems generators.
+
+Each core count runs in a fresh process pinned to that many cores (Linux only), so torch's
+thread pool is sized for it. Sequential runs use all pinned cores for intra-op threads;
+concurrent runs use a GeneratorPool, which splits them between the workers; the MCQ and
+short-answer generators then decode on their worker rather than through the QG batch scheduler.
+
+Run from the backend folder:
+    python -m benchmarks.concurrent_generators --cores 4 8 16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', help='Text file to use instead of the built-in sample passages')
+    parser.add_argument('--cores', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per mode')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--max_questions', type=int, default=4)
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def run_child(args):
+    os.sched_setaffinity(0, range(args.child))
+
+    import torch
+    from Generator import main
+    from Generator.concurrency import GeneratorPool
+    from benchmarks.sample_texts import load_text
+
+    text = load_text(args.file)
+    mcq, boolq, shortq = main.MCQGenerator(), main.BoolQGenerator(), main.ShortQGenerator()
+    payload = {"input_text": text, "max_questions": args.max_questions}
+
+    def tasks(analysis):
+        return {
+            "mcq": lambda: mcq.generate_mcq(payload, analysis),
+            "boolq": lambda: boolq.generate_boolq(payload, analysis),
+            "shortq": lambda: shortq.generate_shortq(payload, analysis),
+        }
+
+    def timed(run):
+        timings = []
+        for _ in range(args.runs + 1):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings[1:])
+
+    torch.set_num_threads(args.child)
+    sequential = timed(lambda: [task() for task in tasks(mcq.analyze(text)).values()])
+
+    pool = GeneratorPool(args.workers)
+    concurrent = timed(lambda: pool.run(tasks(mcq.analyze(text))))
+    pool.shutdown()
+
+    print(json.dumps({
+        "cores": args.child,
+        "sequential": sequential,
+        "concurrent": concurrent,
+        "torch_threads_per_worker": pool.torch_threads,
+    }))
+
+
+def main():
+    args = parse_arguments()
+    if args.child:
+        run_child(args)
+        return
+
+    available = len(os.sched_getaffinity(0))
+    print(f"{'cores':>5} {'sequential':>11} {'concurrent':>11} {'speedup':>8}")
+    for cores in args.cores:
+        if cores > available:
+            print(f"{cores:>5} skipped: only {available} cores available")
+            continue
+        command = [sys.executable, '-m', 'benchmarks.concurrent_generators', '--child', str(cores),
+                   '--runs', str(args.runs), '--workers', str(args.workers),
+                   '--max_questions', str(args.max_questions)]
+        if args.file:
+            command += ['--file', args.file]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{cores:>5} {result['sequential']:>10.2f}s {result['concurrent']:>10.2f}s "
+              f"{result['sequential'] / result['concurrent']:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compares padding strategies for the MCQ / short-answer question generation batch.
+
+Prompts are "context: <snippet> answer: <keyword>" strings built from snippets of one to three
+sentences of the sample passages, as generate_multiple_choice_questions sends them. Strategies:
+
+  max_length  every prompt padded to the tokenizer's model_max_length, in arrival order
+  longest     each batch padded to its longest prompt, in arrival order (previous behaviour)
+  buckets     generate_in_length_buckets: sorted by length, split on --max-pad-ratio
+
+Reports input positions processed (including padding), generate calls and wall time.
+
+Run from the backend folder:
+    python -m benchmarks.dynamic_padding --prompts 32
+"""
+import argparse
+import random
+import re
+import time
+
+import torch
+from transformers import T5ForConditionalGeneration, T5Tokenizer
+
+from benchmarks.sample_texts import SAMPLE_TEXTS
+from Generator.batching import generate_in_length_buckets
+
+
+def make_prompts(count, rng):
+    sentences = [s for text in SAMPLE_TEXTS for s in re.split(r"(?<=[.!?])\s+", text) if s]
+    prompts = []
+    for _ in range(count):
+        start = rng.randrange(len(sentences))
+        snippet = " ".join(sentences[start:start + rng.randint(1, 3)])
+        answer = rng.choice(re.findall(r"[A-Za-z]{5,}", snippet) or ["answer"])
+        prompts.append("context: " + snippet + " answer: " + answer + " </s>")
+    return prompts
+
+
+def generate_in_order(model, tokenizer, prompts, device, max_batch_size, padding, stats):
+    decoded = []
+    for start in range(0, len(prompts), max_batch_size):
+        batch = tokenizer(prompts[start:start + max_batch_size], padding=padding, truncation=True, return_tensors="pt")
+        stats["batches"] = stats.get("batches", 0) + 1
+        stats["padded_tokens"] = stats.get("padded_tokens", 0) + batch["input_ids"].numel()
+        with torch.no_grad():
+            outputs = model.generate(input_ids=batch["input_ids"].to(device), attention_mask=batch["attention_mask"].to(device), max_length=150)
+        decoded.extend(tokenizer.decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=True) for out in outputs)
+    return decoded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='Roasters/Question-Generator')
+    parser.add_argument('--tokenizer', default='t5-large')
+    parser.add_argument('--prompts', type=int, default=32, help='Prompts per run')
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    parser.add_argument('--max-pad-ratio', type=float, default=1.5)
+    parser.add_argument('--runs', type=int, default=2, help='Timed runs per strategy')
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = T5Tokenizer.from_pretrained(args.tokenizer)
+    model = T5ForConditionalGeneration.from_pretrained(args.model).to(device)
+    model.eval()
+    prompts = make_prompts(args.prompts, random.Random(42))
+    lengths = [len(ids) for ids in tokenizer(prompts)["input_ids"]]
+    print(f"{len(prompts)} prompts, {min(lengths)}-{max(lengths)} tokens, {sum(lengths)} real tokens")
+
+    strategies = {
+        "max_length": lambda stats: generate_in_order(model, tokenizer, prompts, device, args.max_batch_size, "max_length", stats),
+        "longest": lambda stats: generate_in_order(model, tokenizer, prompts, device, args.max_batch_size, "longest", stats),
+        "buckets": lambda stats: generate_in_length_buckets(
+            model, tokenizer, prompts, device, max_batch_size=args.max_batch_size, max_pad_ratio=args.max_pad_ratio, stats=stats
+        ),
+    }
+    results = {}
+    for name, run in strategies.items():
+        run({})  # warm up
+        timings = []
+        for _ in range(args.runs):
+            stats = {}
+            start = time.perf_counter()
+            results[name] = run(stats)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<11} {stats['padded_tokens']:7d} input positions, {stats['batches']:3d} generate calls, {min(timings):7.2f}s")
+
+    same = sum(a == b for a, b in zip(results["longest"], results["buckets"]))
+    print(f"identical questions (longest vs buckets): {same}/{len(prompts)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Quality and latency comparison of the keyphrase extractors.
+
+For every sample passage the text is parsed once with spaCy (the parse DocumentAnalysis already
+runs), then each extractor in Generator.keyphrases is timed. The extractor under test is compared
+with the reference (pke MultipartiteRank by default) by the overlap of their top-n keyphrases.
+
+Run from the backend folder:
+    python -m benchmarks.keyphrases
+    python -m benchmarks.keyphrases --text article.txt --repeat 4 --verbose
+"""
+import argparse
+import time
+
+import spacy
+
+from benchmarks.sample_texts import SAMPLE_TEXTS, load_text
+from Generator.keyphrases import EXTRACTORS, get_extractor
+from Generator.mcq import tokenize_into_sentences
+
+
+def timed(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return result, (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--text', default=None, help='Compare on this file instead of the sample passages')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeat each text to simulate longer inputs')
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per extractor')
+    parser.add_argument('--n', type=int, default=10, help='Keyphrases compared per text')
+    parser.add_argument('--reference', default='multipartite', choices=sorted(EXTRACTORS))
+    parser.add_argument('--candidate', default='positionrank', choices=sorted(EXTRACTORS))
+    parser.add_argument('--verbose', action='store_true', help='Print the keyphrases of both extractors')
+    args = parser.parse_args()
+
+    nlp = spacy.load('en_core_web_sm')
+    texts = [load_text(args.text, args.repeat)] if args.text else ["\n".join([text] * args.repeat) for text in SAMPLE_TEXTS]
+    extractors = {name: get_extractor(name) for name in (args.reference, args.candidate)}
+    totals = {name: 0.0 for name in extractors}
+    parse_total = 0.0
+    overlaps = []
+
+    for i, text in enumerate(texts):
+        modified_text = " ".join(tokenize_into_sentences(text))
+        doc, parse_time = timed(lambda: nlp(modified_text), 1)
+        parse_total += parse_time
+
+        phrases = {}
+        for name, extractor in extractors.items():
+            phrases[name], elapsed = timed(lambda: extractor.extract(modified_text, doc, args.n), args.runs)
+            totals[name] += elapsed
+
+        reference, candidate = set(phrases[args.reference]), set(phrases[args.candidate])
+        overlap = len(reference & candidate) / max(len(reference), 1)
+        overlaps.append(overlap)
+        print(f"text {i}: {len(doc)} tokens, top-{args.n} overlap {overlap:.0%}")
+        if args.verbose:
+            for name in extractors:
+                print(f"  {name:<14} {phrases[name]}")
+
+    print(f"\nspaCy parse (shared)     {parse_total / len(texts) * 1000:9.1f} ms/text")
+    for name in extractors:
+        print(f"{name:<24} {totals[name] / len(texts) * 1000:9.1f} ms/text")
+    print(f"mean top-{args.n} overlap     {sum(overlaps) / len(overlaps):9.0%}")
+
+
+if __name__ == '__main__':
+    main()
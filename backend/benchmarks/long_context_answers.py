@@ -0,0 +1,73 @@
+"""Answer latency on long texts with and without retrieve-then-read.
+
+The sample article is repeated to simulate chapters of growing length. For each length, reports the
+time to build the BM25 window index and pick the windows of every question, then answers the
+questions with the full text as context (EDUAID_ANSWER_RETRIEVAL_MIN_WORDS=0) and with retrieval,
+and prints the time per question and how many answers agree.
+
+Run from the backend folder:
+    python -m benchmarks.long_context_answers
+    python -m benchmarks.long_context_answers --models qa t5 --repeats 1 8 --retrieval-only
+"""
+import argparse
+import time
+
+from benchmarks.sample_texts import SAMPLE_QUESTIONS, load_text
+from Generator import config
+from Generator.retrieval import WindowRetriever
+
+
+def answer(model, key, context, questions):
+    if key == "qa":
+        return [result["answer"] for result in model.answer_questions(context, questions)]
+    return model.answer_questions(context, questions)
+
+
+def timed_answers(model, key, context, questions, min_words):
+    previous = config.ANSWER_RETRIEVAL_MIN_WORDS
+    config.ANSWER_RETRIEVAL_MIN_WORDS = min_words
+    try:
+        start = time.perf_counter()
+        answers = answer(model, key, context, questions)
+        return answers, (time.perf_counter() - start) / len(questions)
+    finally:
+        config.ANSWER_RETRIEVAL_MIN_WORDS = previous
+
+
+def load_model(key):
+    from Generator.main import AnswerPredictor, QAPipeline
+    return QAPipeline() if key == "qa" else AnswerPredictor()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', nargs='+', default=["qa"], choices=["qa", "t5"])
+    parser.add_argument('--repeats', nargs='+', type=int, default=[1, 4, 16], help='Article repetitions')
+    parser.add_argument('--retrieval-only', action='store_true', help='Only time the window index')
+    args = parser.parse_args()
+
+    questions = SAMPLE_QUESTIONS
+    models = {} if args.retrieval_only else {key: load_model(key) for key in args.models}
+    try:
+        for repeat in args.repeats:
+            text = load_text(repeat=repeat)
+            start = time.perf_counter()
+            retriever = WindowRetriever(text)
+            contexts = [retriever.context(question) for question in questions]
+            retrieval_ms = (time.perf_counter() - start) * 1000
+            print(f"{len(text.split()):6d} words: {len(retriever.ranges)} windows, index and lookup "
+                  f"{retrieval_ms:.1f} ms, {sum(len(c.split()) for c in contexts) / len(contexts):.0f} context words/question")
+
+            for key, model in models.items():
+                full, full_time = timed_answers(model, key, text, questions, 0)
+                retrieved, retrieved_time = timed_answers(model, key, text, questions, 1)
+                same = sum(a == b for a, b in zip(full, retrieved))
+                print(f"  {key:<3} full text {full_time * 1000:8.1f} ms/question, retrieval "
+                      f"{retrieved_time * 1000:8.1f} ms/question, {same}/{len(questions)} identical answers")
+    finally:
+        for model in models.values():
+            model.close()
+
+
+if __name__ == '__main__':
+    main()
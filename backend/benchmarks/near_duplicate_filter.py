@@ -0,0 +1,97 @@
+"""Micro-benchmark of distractor near-duplicate filtering.
+
+Compares building the full edit-distance-1 variation set of every answer (the previous
+find_similar_words approach) with checking candidates directly with NearDuplicateFilter.
+Neighbour lists mimic sense2vec output: case and plural variants, typos and related terms.
+
+Run from the backend folder:
+    python -m benchmarks.near_duplicate_filter
+"""
+import argparse
+import random
+import string
+import time
+
+from Generator.mcq import NearDuplicateFilter
+
+ANSWERS = [
+    "machine learning", "neural networks", "artificial intelligence", "speech recognition",
+    "expert systems", "robotics", "photosynthesis", "chlorophyll", "carbon dioxide",
+    "calvin cycle", "thylakoid membranes", "steam engine", "industrial revolution",
+    "textile industry", "factory act", "spinning jenny", "power loom", "railways",
+    "natural language processing", "deep learning",
+]
+
+RELATED = [
+    "computer vision", "data mining", "statistics", "algorithms", "pattern recognition",
+    "biology", "chemistry", "oxygen", "glucose", "mitochondria", "cell membrane", "coal",
+    "iron", "canals", "child labour", "manchester", "cotton", "locomotives", "automation",
+    "big data", "reinforcement learning", "genetics", "enzymes", "electricity",
+]
+
+
+def legacy_word_variations(word):
+    letters = 'abcdefghijklmnopqrstuvwxyz ' + string.punctuation
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [L + R[1:] for L, R in splits if R]
+    transposes = [L + R[1] + R[0] + R[2:] for L, R in splits if len(R) > 1]
+    replaces = [L + c + R[1:] for L, R in splits if R for c in letters]
+    inserts = [L + c + R for L, R in splits for c in letters]
+    return set(deletes + transposes + replaces + inserts)
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def neighbours(answer, rng, n=15):
+    candidates = [answer.title(), answer.upper(), answer + "s", typo(answer, rng), answer.replace(" ", "-")]
+    candidates += rng.sample(RELATED, n - len(candidates))
+    rng.shuffle(candidates)
+    return candidates
+
+
+def legacy_filter(answer, candidates):
+    word_preprocessed = answer.translate(answer.maketrans("", "", string.punctuation)).lower()
+    word_variations = legacy_word_variations(word_preprocessed)
+    compare_list = [word_preprocessed]
+    output = []
+    for candidate in candidates:
+        processed = candidate.lower().translate(candidate.maketrans("", "", string.punctuation))
+        if processed not in compare_list and word_preprocessed not in processed and processed not in word_variations:
+            output.append(candidate.title())
+            compare_list.append(processed)
+    return output
+
+
+def new_filter(answer, candidates):
+    word_preprocessed = NearDuplicateFilter.normalize(answer)
+    near_duplicates = NearDuplicateFilter([word_preprocessed])
+    output = []
+    for candidate in candidates:
+        processed = NearDuplicateFilter.normalize(candidate)
+        if word_preprocessed not in processed and near_duplicates.accept(processed):
+            output.append(candidate.title())
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=50, help='Passes over the answer set')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    workload = [(answer, neighbours(answer, rng)) for answer in ANSWERS]
+
+    for name, filter_fn in [("variation set", legacy_filter), ("NearDuplicateFilter", new_filter)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            kept = sum(len(filter_fn(answer, candidates)) for answer, candidates in workload)
+        elapsed = time.perf_counter() - start
+        per_answer = elapsed / (args.repeat * len(workload)) * 1e6
+        print(f"{name:<20} {per_answer:8.1f} us/answer, {kept} distractors kept")
+
+
+if __name__ == '__main__':
+    main()
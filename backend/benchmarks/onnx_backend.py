@@ -0,0 +1,97 @@
+"""CPU throughput of the ONNX Runtime backend against eager PyTorch.
+
+Seq2seq models generate greedily for prompts built from the sample passages (the same prompts as
+benchmarks.quantization); the QA evaluator and NLI model classify sentence pairs in batches.
+Reports items per second for both backends and how often their outputs agree. Models missing
+from EDUAID_ONNX_DIR are exported first (see `python -m Generator.onnx_backend`).
+
+Run from the backend folder:
+    python -m benchmarks.onnx_backend
+    python -m benchmarks.onnx_backend --models qg nli --prompts 8
+"""
+import argparse
+import time
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, AutoTokenizer
+
+from benchmarks.quantization import MODELS as SEQ2SEQ, _snippets
+from Generator import onnx_backend
+
+CLASSIFIERS = {
+    "qa_evaluator": "iarfmoose/bert-base-cased-qa-evaluator",
+    "nli": "typeform/distilbert-base-uncased-mnli",
+}
+
+
+def generate_all(model, tokenizer, prompts, max_length):
+    outputs = []
+    with torch.no_grad():
+        for prompt in prompts:
+            encoding = tokenizer(prompt, return_tensors="pt")
+            generated = model.generate(input_ids=encoding["input_ids"], attention_mask=encoding["attention_mask"], max_length=max_length)
+            outputs.append(tokenizer.decode(generated[0], skip_special_tokens=True))
+    return outputs
+
+
+def classify_all(model, tokenizer, pairs, batch_size):
+    labels = []
+    with torch.no_grad():
+        for start in range(0, len(pairs), batch_size):
+            first, second = zip(*pairs[start:start + batch_size])
+            encoding = tokenizer(list(first), list(second), padding=True, truncation=True, return_tensors="pt")
+            labels.extend(model(**encoding).logits.argmax(dim=-1).tolist())
+    return labels
+
+
+def timed(fn):
+    fn()  # warm up
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', nargs='+', default=sorted(SEQ2SEQ) + sorted(CLASSIFIERS), choices=sorted(SEQ2SEQ) + sorted(CLASSIFIERS))
+    parser.add_argument('--prompts', type=int, default=8, help='Prompts (or sentence pairs) per model')
+    parser.add_argument('--batch-size', type=int, default=8, help='Batch size for the classifiers')
+    parser.add_argument('--max-length', type=int, default=64)
+    parser.add_argument('--onnx-dir', default=None, help='Defaults to EDUAID_ONNX_DIR')
+    args = parser.parse_args()
+
+    snippets = list(_snippets())[:args.prompts]
+    print(f"torch threads: {torch.get_num_threads()}")
+
+    for key in args.models:
+        if key in SEQ2SEQ:
+            name, tokenizer_name, make_prompt = SEQ2SEQ[key]
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            prompts = [make_prompt(snippet, answer) for snippet, answer in snippets]
+            backends = {
+                "torch": AutoModelForSeq2SeqLM.from_pretrained(name).eval(),
+                "onnx": onnx_backend.load_seq2seq(name, args.onnx_dir),
+            }
+            run = lambda model: generate_all(model, tokenizer, prompts, args.max_length)
+        else:
+            name = CLASSIFIERS[key]
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            prompts = [(snippet, "What is %s?" % answer) for snippet, answer in snippets]
+            backends = {
+                "torch": AutoModelForSequenceClassification.from_pretrained(name).eval(),
+                "onnx": onnx_backend.load_classifier(name, args.onnx_dir),
+            }
+            run = lambda model: classify_all(model, tokenizer, prompts, args.batch_size)
+
+        results = {}
+        print(name)
+        for backend, model in backends.items():
+            results[backend], elapsed = timed(lambda: run(model))
+            print(f"  {backend:<6} {len(prompts) / elapsed:8.2f} items/s")
+        same = sum(a == b for a, b in zip(results["torch"], results["onnx"]))
+        print(f"  outputs agree: {same}/{len(prompts)}")
+        del backends
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Micro-benchmark of /get_mcq_answer option matching.
+
+Compares fitting a TfidfVectorizer per question and taking dense cosine similarities (the previous
+loop) with best_options, which fits once per request and stays sparse. Generated answers are
+paraphrases of one option, as the QA pipeline returns spans of the passage. The QA calls are not
+timed here; see `python -m benchmarks.batched_answers` for those.
+
+Run from the backend folder:
+    python -m benchmarks.option_matching
+    python -m benchmarks.option_matching --questions 200 --options 5
+"""
+import argparse
+import random
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from benchmarks.near_duplicate_filter import ANSWERS, RELATED
+from Generator.option_matching import best_options
+
+PREFIXES = ["the", "a form of", "mainly", "the process of", "early", "modern"]
+
+
+def legacy_best_options(answers, options):
+    indices = []
+    for generated_answer, question_options in zip(answers, options):
+        vectors = TfidfVectorizer().fit_transform(question_options + [generated_answer]).toarray()
+        similarities = cosine_similarity(vectors[:-1], vectors[-1].reshape(1, -1)).flatten()
+        indices.append(int(similarities.argmax()))
+    return indices
+
+
+def workload(questions, options_per_question, rng):
+    vocabulary = ANSWERS + RELATED
+    answers, options = [], []
+    for _ in range(questions):
+        question_options = rng.sample(vocabulary, options_per_question)
+        answers.append("%s %s" % (rng.choice(PREFIXES), rng.choice(question_options)))
+        options.append(question_options)
+    return answers, options
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--options', type=int, default=4, help='Options per question')
+    parser.add_argument('--repeat', type=int, default=20, help='Requests to time')
+    args = parser.parse_args()
+
+    answers, options = workload(args.questions, args.options, random.Random(42))
+
+    results = {}
+    for name, match in [("per question", legacy_best_options), ("best_options", best_options)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[name] = match(answers, options)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<13} {elapsed * 1000:8.2f} ms/request ({args.questions} x {args.options})")
+
+    same = sum(a == b for a, b in zip(results["per question"], results["best_options"]))
+    print(f"{same}/{args.questions} identical choices")
+
+
+if __name__ == '__main__':
+    main()
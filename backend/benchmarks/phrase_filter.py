@@ -0,0 +1,74 @@
+"""Micro-benchmark of filter_useful_phrases.
+
+Compares the previous exhaustive scan, which computes the normalized Levenshtein distance to every
+accepted phrase, with the DistantPhraseIndex pruning now used by filter_useful_phrases. Both must
+return the same phrases. Candidates are noun phrases built from a topic vocabulary plus
+near-duplicate variants, the mix identify_keywords sees on long articles.
+
+Run from the backend folder:
+    python -m benchmarks.phrase_filter
+    python -m benchmarks.phrase_filter --phrases 500 --max-count 500
+"""
+import argparse
+import random
+import time
+
+from similarity.normalized_levenshtein import NormalizedLevenshtein
+
+from Generator.mcq import are_words_distant, filter_useful_phrases
+
+WORDS = [
+    "machine", "learning", "neural", "network", "artificial", "intelligence", "speech", "recognition",
+    "expert", "system", "photosynthesis", "chlorophyll", "carbon", "dioxide", "calvin", "cycle",
+    "thylakoid", "membrane", "steam", "engine", "industrial", "revolution", "textile", "industry",
+    "factory", "spinning", "power", "loom", "railway", "language", "processing", "deep", "vision",
+    "energy", "glucose", "oxygen", "cell", "plant", "coal", "iron", "cotton", "data", "model",
+]
+
+
+def legacy_filter_useful_phrases(phrase_keys, max_count, normalized_levenshtein):
+    filtered_phrases = []
+    if phrase_keys:
+        filtered_phrases.append(phrase_keys[0])
+        for ph in phrase_keys[1:]:
+            if are_words_distant(filtered_phrases, ph, 0.7, normalized_levenshtein):
+                filtered_phrases.append(ph)
+            if len(filtered_phrases) >= max_count:
+                break
+    return filtered_phrases
+
+
+def make_phrases(count, rng):
+    phrases = []
+    while len(phrases) < count:
+        phrase = " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+        phrases.append(phrase)
+        if rng.random() < 0.3:
+            phrases.append(rng.choice([phrase.title(), phrase + "s", phrase[:-1], phrase.upper()]))
+    return phrases[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--phrases', type=int, default=300, help='Candidate phrases per call')
+    parser.add_argument('--max-count', type=int, default=300, help='max_count passed to filter_useful_phrases')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed calls per implementation')
+    args = parser.parse_args()
+
+    normalized_levenshtein = NormalizedLevenshtein()
+    phrases = make_phrases(args.phrases, random.Random(42))
+
+    results = {}
+    for name, filter_fn in [("exhaustive scan", legacy_filter_useful_phrases), ("DistantPhraseIndex", filter_useful_phrases)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[name] = filter_fn(phrases, args.max_count, normalized_levenshtein)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{name:<20} {elapsed * 1000:9.1f} ms/call, {len(results[name])} phrases kept")
+
+    assert results["exhaustive scan"] == results["DistantPhraseIndex"], "filters disagree"
+    print("results identical")
+
+
+if __name__ == '__main__':
+    main()
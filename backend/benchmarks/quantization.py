@@ -0,0 +1,108 @@
+"""Quality, latency and memory check of EDUAID_QUANTIZE_INT8 for the T5 models.
+
+Each model generates greedily for a fixed set of prompts built from the sample passages, first in
+fp32 and then after dynamic int8 quantization of its Linear layers (the same quantize_int8 used at
+load time). Reports per-prompt latency, model size, RSS, exact-match rate of the outputs and their
+mean normalized Levenshtein similarity to the fp32 outputs.
+
+Run from the backend folder (CPU only):
+    python -m benchmarks.quantization
+    python -m benchmarks.quantization --models qg boolq --prompts 8 --verbose
+"""
+import argparse
+import re
+import time
+
+import torch
+from similarity.normalized_levenshtein import NormalizedLevenshtein
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from benchmarks.sample_texts import SAMPLE_TEXTS
+from Generator.model_registry import current_rss_bytes, estimate_nbytes, quantize_int8
+
+
+def _snippets():
+    for text in SAMPLE_TEXTS:
+        sentences = re.split(r"(?<=[.!?])\s+", text)
+        for start in range(0, len(sentences), 3):
+            snippet = " ".join(sentences[start:start + 3])
+            answer = max(re.findall(r"[A-Za-z]+", snippet), key=len)
+            yield snippet, answer
+
+
+def qg_prompt(snippet, answer):
+    return "context: " + snippet + " answer: " + answer + " </s>"
+
+
+def boolq_prompt(snippet, answer):
+    return "truefalse: %s passage: %s </s>" % (snippet, answer)
+
+
+def answer_prompt(snippet, answer):
+    return "question: What is %s? <s> context: %s </s>" % (answer, snippet)
+
+
+def hard_qg_prompt(snippet, answer):
+    return "<answer> %s <context> %s" % (answer, snippet)
+
+
+MODELS = {
+    "qg": ("Roasters/Question-Generator", "t5-large", qg_prompt),
+    "boolq": ("Roasters/Boolean-Questions", "t5-base", boolq_prompt),
+    "answer": ("Roasters/Answer-Predictor", "t5-large", answer_prompt),
+    "hard_qg": ("iarfmoose/t5-base-question-generator", "iarfmoose/t5-base-question-generator", hard_qg_prompt),
+}
+
+
+def run(model, tokenizer, prompts, max_length):
+    outputs = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for prompt in prompts:
+            encoding = tokenizer(prompt, return_tensors="pt")
+            generated = model.generate(**encoding, max_length=max_length)
+            outputs.append(tokenizer.decode(generated[0], skip_special_tokens=True))
+    return outputs, (time.perf_counter() - start) / len(prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', nargs='+', default=sorted(MODELS), choices=sorted(MODELS))
+    parser.add_argument('--prompts', type=int, default=12, help='Prompts per model')
+    parser.add_argument('--max-length', type=int, default=64)
+    parser.add_argument('--verbose', action='store_true', help='Print outputs that differ')
+    args = parser.parse_args()
+
+    normalized_levenshtein = NormalizedLevenshtein()
+    snippets = list(_snippets())[:args.prompts]
+
+    for key in args.models:
+        name, tokenizer_name, make_prompt = MODELS[key]
+        prompts = [make_prompt(snippet, answer) for snippet, answer in snippets]
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+        rss_before = current_rss_bytes()
+        model = AutoModelForSeq2SeqLM.from_pretrained(name).eval()
+        fp32_rss, fp32_bytes = current_rss_bytes() - rss_before, estimate_nbytes(model)
+        fp32_outputs, fp32_latency = run(model, tokenizer, prompts, args.max_length)
+
+        model = quantize_int8(model)
+        int8_rss, int8_bytes = current_rss_bytes() - rss_before, estimate_nbytes(model)
+        int8_outputs, int8_latency = run(model, tokenizer, prompts, args.max_length)
+
+        exact = sum(a == b for a, b in zip(fp32_outputs, int8_outputs))
+        similarity = sum(normalized_levenshtein.similarity(a, b) for a, b in zip(fp32_outputs, int8_outputs)) / len(prompts)
+        print(f"{name}")
+        print(f"  latency  fp32 {fp32_latency * 1000:8.1f} ms  int8 {int8_latency * 1000:8.1f} ms  ({fp32_latency / int8_latency:.2f}x)")
+        print(f"  weights  fp32 {fp32_bytes / 2**20:8.1f} MB  int8 {int8_bytes / 2**20:8.1f} MB")
+        print(f"  rss      fp32 {fp32_rss / 2**20:8.1f} MB  int8 {int8_rss / 2**20:8.1f} MB (process delta since load)")
+        print(f"  outputs  {exact}/{len(prompts)} identical, mean similarity {similarity:.3f}")
+        if args.verbose:
+            for a, b in zip(fp32_outputs, int8_outputs):
+                if a != b:
+                    print(f"    fp32: {a}\n    int8: {b}")
+        del model
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Sample passages shared by the benchmark scripts. Pass --file to a benchmark to use your own text."""
+
+AI_TEXT = """Artificial intelligence (AI) is the simulation of human intelligence processes by machines, especially computer systems. These processes include learning (the acquisition of information and rules for using the information), reasoning (using rules to reach approximate or definite conclusions), and self-correction.
+AI applications include speech recognition, natural language processing, machine vision, expert systems, and robotics. Machine learning, a subset of AI, focuses on the development of algorithms that can learn from and make predictions or decisions based on data.
+Deep learning, a technique within machine learning, involves neural networks with many layers (hence the term "deep"). It has revolutionized AI by enabling complex pattern recognition and data processing tasks.
+Ethical considerations in AI include issues of bias in algorithms, privacy concerns with data collection, and the impact of AI on jobs and society as a whole."""
+
+PHOTOSYNTHESIS_TEXT = """Photosynthesis is the process used by plants, algae and certain bacteria to convert light energy into chemical energy. The energy is stored in carbohydrate molecules, such as sugars and starches, which are synthesized from carbon dioxide and water.
+In most plants, photosynthesis takes place in the chloroplasts of leaf cells. Chloroplasts contain chlorophyll, a green pigment that absorbs light most strongly in the blue and red portions of the spectrum. The light-dependent reactions occur in the thylakoid membranes, where water is split and oxygen is released as a by-product.
+The Calvin cycle, also known as the light-independent reactions, takes place in the stroma of the chloroplast. During the Calvin cycle, the enzyme RuBisCO fixes carbon dioxide into an organic molecule, which is then reduced using ATP and NADPH produced by the light-dependent reactions.
+Photosynthesis is responsible for producing and maintaining the oxygen content of the Earth's atmosphere. It also supplies most of the energy necessary for life on Earth, and the organic compounds it produces form the base of nearly every food chain."""
+
+HISTORY_TEXT = """The Industrial Revolution began in Great Britain in the late eighteenth century and spread to Western Europe and North America over the following decades. It marked a shift from hand production methods to machines, new chemical manufacturing processes and the increasing use of steam power.
+The textile industry was the first to use modern production methods. Inventions such as the spinning jenny, the water frame and the power loom greatly increased the output of cotton cloth. James Watt improved the steam engine in 1776, making it practical for factories, mines and later railways.
+The growth of factories drew workers from the countryside into rapidly expanding cities such as Manchester and Birmingham. Working conditions were often dangerous, and children were commonly employed for long hours. Reform movements eventually led to laws such as the Factory Act of 1833, which limited child labour.
+The Industrial Revolution transformed transport as well. The Stockton and Darlington Railway opened in 1825 as the first public railway to use steam locomotives, and canals and improved roads connected industrial towns with ports and markets."""
+
+SAMPLE_TEXTS = [AI_TEXT, PHOTOSYNTHESIS_TEXT, HISTORY_TEXT]
+
+# Questions about the sample passages, for the answering benchmarks.
+SAMPLE_QUESTIONS = [
+    "What is machine learning?",
+    "What do neural networks do?",
+    "What is artificial intelligence used for?",
+    "What does chlorophyll absorb?",
+    "Where does the Calvin cycle take place?",
+    "What is produced during photosynthesis?",
+    "When did the industrial revolution begin?",
+    "Which industry was transformed first?",
+    "What powered the factories?",
+    "What did the railways change?",
+]
+
+
+def load_text(path=None, repeat=1):
+    """Returns the contents of path, or all sample passages joined as one multi-paragraph article.
+    The article is repeated `repeat` times to simulate longer inputs.
+    """
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = "\n".join(SAMPLE_TEXTS)
+    return "\n".join([text] * repeat)
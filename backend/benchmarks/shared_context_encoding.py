@@ -0,0 +1,52 @@
+"""Compares QuestionGenerator with and without shared context encoding on a multi-paragraph article.
+
+Run from the backend folder:
+    python -m benchmarks.shared_context_encoding --repeat 3
+"""
+import argparse
+import time
+
+from Generator.main import QuestionGenerator
+from benchmarks.sample_texts import load_text
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', help='Text file to use instead of the built-in sample passages')
+    parser.add_argument('--repeat', type=int, default=2, help='Number of times to repeat the article')
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per mode')
+    parser.add_argument('--answer_style', default='sentences', choices=['all', 'sentences', 'multiple_choice'])
+    return parser.parse_args()
+
+
+def time_mode(qg, article, answer_style, runs):
+    qg.generate(article=article, answer_style=answer_style)  # warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = qg.generate(article=article, answer_style=answer_style)
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+def main():
+    args = parse_arguments()
+    article = load_text(args.file, args.repeat)
+
+    qg = QuestionGenerator(share_context_encoding=False)
+    qg_inputs, _ = qg.generate_qg_inputs(article, args.answer_style)
+    contexts = {context for _, context in qg.generate_qg_pairs(article, args.answer_style)[0]}
+    print(f"{len(article.split())} words, {len(qg_inputs)} answers over {len(contexts)} contexts")
+
+    baseline_time, baseline = time_mode(qg, article, args.answer_style, args.runs)
+    qg.share_context_encoding = True
+    shared_time, shared = time_mode(qg, article, args.answer_style, args.runs)
+
+    same = sum(a["question"] == b["question"] for a, b in zip(baseline, shared))
+    print(f"joint encoding:  {baseline_time:.2f}s")
+    print(f"shared encoding: {shared_time:.2f}s ({baseline_time / shared_time:.2f}x speedup)")
+    print(f"identical questions: {same}/{len(baseline)}")
+
+
+if __name__ == '__main__':
+    main()
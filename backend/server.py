@@ -1,22 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
 from pprint import pprint
 import nltk
 import subprocess
 import os
 import glob
+import functools
+import time
 
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
 nltk.download("stopwords")
 nltk.download('punkt_tab')
 from Generator import main
 from Generator.question_filters import make_question_harder
 from Generator.llm_generator import LLMQuestionGenerator
+from Generator.model_registry import registry
+from Generator.model_manager import ModelManager
+from Generator import config
+from Generator.result_cache import ResultCache
+from Generator.concurrency import GeneratorPool
+from Generator.option_matching import best_options
+from Generator.jobs import JobRunner, JobStore, parse_family_limits
 import re
 import json
 import spacy
-from transformers import pipeline
 from spacy.lang.en.stop_words import STOP_WORDS
 from string import punctuation
 from heapq import nlargest
@@ -34,17 +40,119 @@ print("Starting Flask App...")
 SERVICE_ACCOUNT_FILE = './service_account_key.json'
 SCOPES = ['https://www.googleapis.com/auth/documents.readonly']
 
-MCQGen = main.MCQGenerator()
-answer = main.AnswerPredictor()
-BoolQGen = main.BoolQGenerator()
-ShortQGen = main.ShortQGenerator()
-qg = main.QuestionGenerator()
+# Models are loaded on their first request and evicted in LRU order under the memory budget.
+models = ModelManager(budget_bytes=config.MODEL_MEMORY_BUDGET_MB * 2**20)
+models.register("mcq", main.MCQGenerator)
+models.register("answer", main.AnswerPredictor)
+models.register("boolq", main.BoolQGenerator)
+models.register("shortq", main.ShortQGenerator)
+models.register("qg", main.QuestionGenerator)
+models.register("qa", main.QAPipeline)
+
 docs_service = main.GoogleDocsService(SERVICE_ACCOUNT_FILE, SCOPES)
 file_processor = main.FileProcessor()
 mediawikiapi = MediaWikiAPI()
-qa_model = pipeline("question-answering")
 llm_generator = LLMQuestionGenerator()
 
+for model_name in config.PRELOAD_MODELS:
+    if model_name not in models.names():
+        print("Ignoring unknown model %r in EDUAID_PRELOAD_MODELS (expected one of %s)" % (model_name, ", ".join(models.names())))
+        continue
+    models.get(model_name)
+
+registry_stats = registry.stats()
+print(
+    "Model registry: %.1f MB resident, %.1f MB saved by sharing"
+    % (registry_stats["resident_bytes"] / 2**20, registry_stats["saved_bytes"] / 2**20)
+)
+
+
+generator_pool = None
+if config.CONCURRENT_GENERATORS:
+    generator_pool = GeneratorPool(config.GENERATOR_WORKERS, config.TORCH_THREADS)
+
+result_cache = None
+if config.RESULT_CACHE:
+    result_cache = ResultCache(
+        config.RESULT_CACHE_PATH,
+        "/".join([config.MODEL_VERSION, config.KEYPHRASE_EXTRACTOR, config.INFERENCE_BACKEND, config.BOOLQ_DECODING] + (["int8"] if config.QUANTIZE_INT8 else [])),
+        memory_entries=config.RESULT_CACHE_MEMORY_ENTRIES,
+        disk_entries=config.RESULT_CACHE_DISK_ENTRIES,
+        ttl_seconds=config.RESULT_CACHE_TTL_SECONDS,
+    )
+
+
+def cache_result(**param_defaults):
+    """Caches the JSON response of a generation endpoint, keyed on the normalized input text,
+    the endpoint and the given request parameters (with their defaults). Requests that send
+    "bypass_cache": true skip the cache.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True) or {}
+            if result_cache is None or data.get("bypass_cache"):
+                return view(*args, **kwargs)
+
+            params = {name: data.get(name, default) for name, default in param_defaults.items()}
+            key = result_cache.make_key(request.path, data.get("input_text", ""), params)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return jsonify(cached)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.is_json:
+                value = response.get_json()
+                # Timings measured for this request would be stale on a hit.
+                if "timing" in value:
+                    value["timing"] = {"cached": True}
+                result_cache.set(key, value)
+            return response
+        return wrapper
+    return decorator
+
+
+# Endpoints that can be run as asynchronous jobs, and the model families (the model names of
+# ModelManager, plus "llm") each one occupies while it runs.
+JOB_FAMILIES = {
+    "/get_mcq": ("mcq",),
+    "/get_boolq": ("boolq",),
+    "/get_shortq": ("shortq",),
+    "/get_problems": ("mcq", "boolq", "shortq"),
+    "/get_shortq_llm": ("llm",),
+    "/get_mcq_llm": ("llm",),
+    "/get_boolq_llm": ("llm",),
+    "/get_problems_llm": ("llm",),
+    "/get_shortq_hard": ("qg",),
+    "/get_mcq_hard": ("qg",),
+    "/get_boolq_hard": ("qg",),
+    "/get_mcq_answer": ("qa",),
+    "/get_shortq_answer": ("qa",),
+    "/get_boolean_answer": ("answer",),
+}
+
+
+def run_job(endpoint, payload):
+    """Runs a queued job through the endpoint's own handler and returns its JSON response."""
+    with app.test_client() as client:
+        response = client.post(endpoint, json=payload)
+    if response.status_code != 200 or not response.is_json:
+        raise RuntimeError("%s returned HTTP %d" % (endpoint, response.status_code))
+    return response.get_json()
+
+
+job_store = None
+job_runner = None
+if config.JOBS:
+    job_store = JobStore(
+        config.JOBS_PATH, retention_seconds=config.JOB_RETENTION_SECONDS, lease_seconds=config.JOB_LEASE_SECONDS
+    )
+    if job_store.requeued:
+        print("Jobs: requeued %d interrupted jobs" % job_store.requeued)
+    job_runner = JobRunner(
+        job_store, run_job, workers=config.JOB_WORKERS, family_limits=parse_family_limits(config.JOB_FAMILY_LIMITS)
+    )
+
 
 def process_input_text(input_text, use_mediawiki):
     if use_mediawiki == 1:
@@ -53,48 +161,55 @@ def process_input_text(input_text, use_mediawiki):
 
 
 @app.route("/get_mcq", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_mcq():
     data = request.get_json()
     input_text = data.get("input_text", "")
     use_mediawiki = data.get("use_mediawiki", 0)
     max_questions = data.get("max_questions", 4)
     input_text = process_input_text(input_text, use_mediawiki)
-    output = MCQGen.generate_mcq(
-        {"input_text": input_text, "max_questions": max_questions}
-    )
+    with models.use("mcq") as mcq_generator:
+        output = mcq_generator.generate_mcq(
+            {"input_text": input_text, "max_questions": max_questions}
+        )
     questions = output["questions"]
     return jsonify({"output": questions})
 
 
 @app.route("/get_boolq", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_boolq():
     data = request.get_json()
     input_text = data.get("input_text", "")
     use_mediawiki = data.get("use_mediawiki", 0)
     max_questions = data.get("max_questions", 4)
     input_text = process_input_text(input_text, use_mediawiki)
-    output = BoolQGen.generate_boolq(
-        {"input_text": input_text, "max_questions": max_questions}
-    )
+    with models.use("boolq") as boolq_generator:
+        output = boolq_generator.generate_boolq(
+            {"input_text": input_text, "max_questions": max_questions}
+        )
     boolean_questions = output["Boolean_Questions"]
     return jsonify({"output": boolean_questions})
 
 
 @app.route("/get_shortq", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_shortq():
     data = request.get_json()
     input_text = data.get("input_text", "")
     use_mediawiki = data.get("use_mediawiki", 0)
     max_questions = data.get("max_questions", 4)
     input_text = process_input_text(input_text, use_mediawiki)
-    output = ShortQGen.generate_shortq(
-        {"input_text": input_text, "max_questions": max_questions}
-    )
+    with models.use("shortq") as shortq_generator:
+        output = shortq_generator.generate_shortq(
+            {"input_text": input_text, "max_questions": max_questions}
+        )
     questions = output["questions"]
     return jsonify({"output": questions})
 
 
 @app.route("/get_shortq_llm", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_shortq_llm():
     try:
         data = request.get_json()
@@ -110,6 +225,7 @@ def get_shortq_llm():
 
 
 @app.route("/get_mcq_llm", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_mcq_llm():
     try:
         data = request.get_json()
@@ -125,6 +241,7 @@ def get_mcq_llm():
 
 
 @app.route("/get_boolq_llm", methods=["POST"])
+@cache_result(max_questions=4, use_mediawiki=0)
 def get_boolq_llm():
     try:
         data = request.get_json()
@@ -140,6 +257,7 @@ def get_boolq_llm():
 
 
 @app.route("/get_problems_llm", methods=["POST"])
+@cache_result(max_questions_mcq=2, max_questions_boolq=2, max_questions_shortq=2, use_mediawiki=0)
 def get_problems_llm():
     try:
         data = request.get_json()
@@ -157,6 +275,7 @@ def get_problems_llm():
 
 
 @app.route("/get_problems", methods=["POST"])
+@cache_result(max_questions_mcq=4, max_questions_boolq=4, max_questions_shortq=4, use_mediawiki=0)
 def get_problems():
     data = request.get_json()
     input_text = data.get("input_text", "")
@@ -165,17 +284,38 @@ def get_problems():
     max_questions_boolq = data.get("max_questions_boolq", 4)
     max_questions_shortq = data.get("max_questions_shortq", 4)
     input_text = process_input_text(input_text, use_mediawiki)
-    output1 = MCQGen.generate_mcq(
-        {"input_text": input_text, "max_questions": max_questions_mcq}
-    )
-    output2 = BoolQGen.generate_boolq(
-        {"input_text": input_text, "max_questions": max_questions_boolq}
-    )
-    output3 = ShortQGen.generate_shortq(
-        {"input_text": input_text, "max_questions": max_questions_shortq}
-    )
+
+    # Sentences, the spaCy parse and keyphrases are computed once and shared by all three generators.
+    with models.use("mcq") as mcq_generator, models.use("boolq") as boolq_generator, models.use("shortq") as shortq_generator:
+        start = time.perf_counter()
+        analysis = mcq_generator.analyze(input_text)
+        analysis.prepare()
+
+        def timed_task(stage, generate, max_questions):
+            def task():
+                with analysis.timed(stage):
+                    return generate({"input_text": input_text, "max_questions": max_questions}, analysis)
+            return task
+
+        tasks = {
+            "mcq": timed_task("mcq", mcq_generator.generate_mcq, max_questions_mcq),
+            "boolq": timed_task("boolq", boolq_generator.generate_boolq, max_questions_boolq),
+            "shortq": timed_task("shortq", shortq_generator.generate_shortq, max_questions_shortq),
+        }
+        if generator_pool is not None:
+            outputs = generator_pool.run(tasks)
+        else:
+            outputs = {name: task() for name, task in tasks.items()}
+    timings = dict(analysis.timings)
+    timings["total"] = time.perf_counter() - start
+
     return jsonify(
-        {"output_mcq": output1, "output_boolq": output2, "output_shortq": output3}
+        {
+            "output_mcq": outputs["mcq"],
+            "output_boolq": outputs["boolq"],
+            "output_shortq": outputs["shortq"],
+            "timing": timings,
+        }
     )
 
 @app.route("/get_mcq_answer", methods=["POST"])
@@ -189,24 +329,12 @@ def get_mcq_answer():
     if not input_questions or not input_options or len(input_questions) != len(input_options):
         return jsonify({"output": outputs})
 
-    for question, options in zip(input_questions, input_options):
-        # Generate answer using the QA model
-        qa_response = qa_model(question=question, context=input_text)
-        generated_answer = qa_response["answer"]
-
-        # Calculate similarity between generated answer and each option
-        options_with_answer = options + [generated_answer]
-        vectorizer = TfidfVectorizer().fit_transform(options_with_answer)
-        vectors = vectorizer.toarray()
-        generated_answer_vector = vectors[-1].reshape(1, -1)
+    with models.use("qa") as qa_model:
+        generated_answers = [qa_response["answer"] for qa_response in qa_model.answer_questions(input_text, input_questions)]
 
-        similarities = cosine_similarity(vectors[:-1], generated_answer_vector).flatten()
-        max_similarity_index = similarities.argmax()
-
-        # Return the option with the highest similarity
-        best_option = options[max_similarity_index]
-        
-        outputs.append(best_option)
+    # Return the option with the highest similarity to each generated answer
+    best = best_options(generated_answers, input_options)
+    outputs = [options[index] if index is not None else None for options, index in zip(input_options, best)]
 
     return jsonify({"output": outputs})
 
@@ -216,10 +344,8 @@ def get_answer():
     data = request.get_json()
     input_text = data.get("input_text", "")
     input_questions = data.get("input_question", [])
-    answers = []
-    for question in input_questions:
-        qa_response = qa_model(question=question, context=input_text)
-        answers.append(qa_response["answer"])
+    with models.use("qa") as qa_model:
+        answers = [qa_response["answer"] for qa_response in qa_model.answer_questions(input_text, input_questions)]
 
     return jsonify({"output": answers})
 
@@ -229,16 +355,12 @@ def get_boolean_answer():
     data = request.get_json()
     input_text = data.get("input_text", "")
     input_questions = data.get("input_question", [])
-    output = []
 
-    for question in input_questions:
+    with models.use("answer") as answer:
         qa_response = answer.predict_boolean_answer(
-            {"input_text": input_text, "input_question": question}
+            {"input_text": input_text, "input_question": input_questions}
         )
-        if(qa_response):
-            output.append("True")
-        else:
-            output.append("False")
+    output = ["True" if value else "False" for value in qa_response]
 
     return jsonify({"output": output})
 
@@ -438,9 +560,10 @@ def get_shortq_hard():
     input_text = process_input_text(input_text,use_mediawiki)
     input_questions = data.get("input_question", [])
 
-    output = qg.generate(
-        article=input_text, num_questions=input_questions, answer_style="sentences"
-    )
+    with models.use("qg") as qg:
+        output = qg.generate(
+            article=input_text, num_questions=input_questions, answer_style="sentences"
+        )
 
     for item in output:
         item["question"] = make_question_harder(item["question"])
@@ -455,9 +578,10 @@ def get_mcq_hard():
     use_mediawiki = data.get("use_mediawiki", 0)
     input_text = process_input_text(input_text,use_mediawiki)
     input_questions = data.get("input_question", [])
-    output = qg.generate(
-        article=input_text, num_questions=input_questions, answer_style="multiple_choice"
-    )
+    with models.use("qg") as qg:
+        output = qg.generate(
+            article=input_text, num_questions=input_questions, answer_style="multiple_choice"
+        )
     
     for q in output:
         q["question"] = make_question_harder(q["question"])
@@ -474,11 +598,12 @@ def get_boolq_hard():
     input_text = process_input_text(input_text, use_mediawiki)
 
     # Generate questions using the same QG model
-    generated = qg.generate(
-        article=input_text,
-        num_questions=input_questions,
-        answer_style="true_false"
-    )
+    with models.use("qg") as qg:
+        generated = qg.generate(
+            article=input_text,
+            num_questions=input_questions,
+            answer_style="true_false"
+        )
 
     # Apply transformation to make each question harder
     harder_questions = [make_question_harder(q) for q in generated]
@@ -506,6 +631,59 @@ def upload_file():
 def hello():
     return "The server is working fine"
 
+
+@app.route("/models/stats", methods=["GET"])
+def model_stats():
+    return jsonify({"manager": models.stats(), "registry": registry.stats()})
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    if result_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **result_cache.stats()})
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    if job_store is None:
+        return jsonify({"error": "Jobs are disabled"}), 404
+    data = request.get_json(silent=True) or {}
+    endpoint = data.get("endpoint")
+    payload = data.get("payload", {})
+    if endpoint not in JOB_FAMILIES:
+        return jsonify({"error": "Unsupported endpoint %r" % endpoint, "endpoints": sorted(JOB_FAMILIES)}), 400
+    if not isinstance(payload, dict):
+        return jsonify({"error": "payload must be a JSON object"}), 400
+
+    job_id = job_store.submit(endpoint, JOB_FAMILIES[endpoint], payload)
+    job_runner.notify()
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+
+@app.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    if job_runner is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **job_runner.stats()})
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_store.get(job_id) if job_store is not None else None
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = job_store.get(job_id) if job_store is not None else None
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if not job_store.cancel(job_id):
+        return jsonify({"error": "Job already finished", **job_store.get(job_id)}), 409
+    return jsonify(job_store.get(job_id))
+
 def clean_transcript(file_path):
     """Extracts and cleans transcript from a VTT file."""
     with open(file_path, "r", encoding="utf-8") as file:
@@ -556,6 +734,10 @@ def get_transcript():
 
     return jsonify({"transcript": transcript_text})
 
+# Started once every route is registered, since requeued jobs may run straight away.
+if job_runner is not None:
+    job_runner.start()
+
 if __name__ == "__main__":
     os.makedirs("subtitles", exist_ok=True)
     app.run()
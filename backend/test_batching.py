@@ -0,0 +1,65 @@
+"""Model-free unit tests of Generator.batching."""
+import random
+import threading
+
+import pytest
+
+from Generator.batching import BatchScheduler, length_buckets
+
+
+def test_size_only_batches():
+    lengths = [3, 5, 1, 5, 2]
+    assert length_buckets(lengths, 2) == [[1, 3], [0, 4], [2]]
+    assert length_buckets([], 4) == []
+    # batch_size below 1 is treated as 1.
+    assert length_buckets([2, 1], 0) == [[0], [1]]
+
+
+def test_buckets_cover_every_item_longest_first():
+    rng = random.Random(0)
+    lengths = [rng.randint(1, 200) for _ in range(300)]
+    for ratio in (0, 1.2, 1.5, 3):
+        buckets = length_buckets(lengths, 16, ratio)
+        assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+        order = [lengths[i] for bucket in buckets for i in bucket]
+        assert order == sorted(lengths, reverse=True)
+
+
+def test_padding_bounds():
+    rng = random.Random(1)
+    lengths = [rng.randint(1, 500) for _ in range(500)]
+    for ratio in (1.2, 1.5, 2):
+        for bucket in length_buckets(lengths, 16, ratio):
+            assert len(bucket) <= 16
+            assert lengths[bucket[0]] <= ratio * lengths[bucket[-1]]
+
+
+def test_zero_lengths_do_not_divide():
+    assert length_buckets([0, 0, 1], 4, 1.5) == [[2, 0, 1]]
+
+
+class EchoScheduler(BatchScheduler):
+    """Decodes every prompt to itself upper-cased instead of running a model."""
+
+    def _generate(self, prompts):
+        return [prompt.upper() for prompt in prompts]
+
+
+def test_scheduler_returns_each_callers_outputs():
+    scheduler = EchoScheduler(None, None, "cpu", max_batch_size=8, max_wait_ms=20)
+    results = {}
+
+    def call(i):
+        results[i] = scheduler.generate(["p%d-a" % i, "p%d-b" % i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    assert results == {i: ["P%d-A" % i, "P%d-B" % i] for i in range(10)}
+    assert scheduler.stats["prompts"] == 20
+    with pytest.raises(RuntimeError):
+        scheduler.generate(["late"])
@@ -0,0 +1,59 @@
+"""Model-free unit tests of Generator.concurrency."""
+import threading
+
+import pytest
+import torch
+
+from Generator import mcq
+from Generator.concurrency import GeneratorPool, in_generator_pool, partition_torch_threads
+
+
+def test_partition_torch_threads():
+    assert partition_torch_threads(3, cores=12) == 4
+    assert partition_torch_threads(3, cores=8) == 2
+    assert partition_torch_threads(4, cores=2) == 1
+    assert partition_torch_threads(0, cores=6) == 6
+
+
+def test_pool_limits_threads_only_in_its_workers():
+    default_threads = torch.get_num_threads()
+    pool = GeneratorPool(max_workers=2, torch_threads=1)
+    try:
+        results = pool.run({
+            "a": lambda: (torch.get_num_threads(), in_generator_pool()),
+            "b": lambda: (torch.get_num_threads(), in_generator_pool()),
+        })
+        assert results == {"a": (1, True), "b": (1, True)}
+
+        fresh = []
+        thread = threading.Thread(target=lambda: fresh.append((torch.get_num_threads(), in_generator_pool())))
+        thread.start()
+        thread.join()
+        assert fresh == [(default_threads, False)]
+        assert torch.get_num_threads() == default_threads and not in_generator_pool()
+    finally:
+        pool.shutdown()
+
+
+def test_pool_reraises_task_errors():
+    pool = GeneratorPool(max_workers=2, torch_threads=1)
+    try:
+        with pytest.raises(ValueError):
+            pool.run({"ok": lambda: 1, "bad": lambda: int("x")})
+    finally:
+        pool.shutdown()
+
+
+def test_pool_workers_bypass_the_batch_scheduler(monkeypatch):
+    class Scheduler:
+        def generate(self, prompts):
+            return ["scheduler"] * len(prompts)
+
+    monkeypatch.setattr(mcq, "generate_in_length_buckets", lambda model, tokenizer, prompts, *args, **kwargs: ["worker"] * len(prompts))
+    generate = lambda: mcq.run_question_generation(["prompt"], "cpu", None, None, Scheduler())
+    assert generate() == ["scheduler"]
+    pool = GeneratorPool(max_workers=1, torch_threads=1)
+    try:
+        assert pool.run({"mcq": generate}) == {"mcq": ["worker"]}
+    finally:
+        pool.shutdown()
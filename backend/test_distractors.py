@@ -0,0 +1,53 @@
+"""Model-free unit tests of Generator.distractors, over a small in-memory sense2vec table."""
+import numpy as np
+from sense2vec import Sense2Vec
+
+from Generator.distractors import DistractorEngine
+
+WORDS = ["python", "java", "ruby", "perl", "rust", "cobol", "haskell", "fortran"]
+
+
+def make_engine():
+    rng = np.random.default_rng(0)
+    s2v = Sense2Vec(shape=(len(WORDS), 8), senses=["NOUN"])
+    for i, word in enumerate(WORDS):
+        s2v.add(word + "|NOUN", rng.standard_normal(8).astype(np.float32), freq=100 - i)
+    return DistractorEngine(s2v)
+
+
+def test_answer_choices():
+    choices = make_engine().answer_choices(["python", "java", "unknown word"], n=3)
+    assert [algorithm for _, algorithm in choices] == ["sense2vec", "sense2vec", "None"]
+    assert len(choices[0][0]) == 3
+    assert "Python" not in choices[0][0]
+    assert choices[2][0] == []
+
+
+def test_answer_choices_survive_one_failing_answer():
+    engine = make_engine()
+    get_best_sense = engine.s2v.get_best_sense
+
+    def failing_best_sense(word, *args, **kwargs):
+        if word == "ruby":
+            raise KeyError(word)
+        return get_best_sense(word, *args, **kwargs)
+
+    engine.s2v.get_best_sense = failing_best_sense
+    choices = engine.answer_choices(["python", "ruby", "java"], n=3)
+    assert choices[1] == ([], "None")
+    assert choices[0][1] == choices[2][1] == "sense2vec"
+
+
+def test_answer_choices_survive_one_failing_search():
+    engine = make_engine()
+    lookup_index = engine._lookup_index
+
+    def failing_lookup(key, n):
+        if key == "java|NOUN":
+            raise IndexError("empty neighbour row")
+        return lookup_index(key, n)
+
+    engine._lookup_index = failing_lookup
+    choices = engine.answer_choices(["python", "java", "perl"], n=3)
+    assert choices[1] == ([], "None")
+    assert choices[0][1] == choices[2][1] == "sense2vec"
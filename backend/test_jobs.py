@@ -0,0 +1,141 @@
+"""Model-free unit tests of Generator.jobs."""
+import threading
+import time
+
+import pytest
+
+from Generator import jobs
+from Generator.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobRunner, JobStore, parse_family_limits
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_parse_family_limits():
+    assert parse_family_limits(["llm=2", " qg = 0"]) == {"llm": 2, "qg": 1}
+    with pytest.raises(ValueError):
+        parse_family_limits(["llm"])
+
+
+def test_claim_finish_and_cancel(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    first = store.submit("/get_mcq", ("mcq",), {"input_text": "a"})
+    second = store.submit("/get_problems", ("mcq", "boolq", "shortq"), {})
+    assert store.queued() == [(first, "/get_mcq", ("mcq",)), (second, "/get_problems", ("mcq", "boolq", "shortq"))]
+
+    assert store.start(first) == {"input_text": "a"}
+    # A job is started once, even if two workers race for it.
+    assert store.start(first) is None
+    assert store.get(first)["status"] == RUNNING
+    store.finish(first, result={"output": [1]})
+    assert store.get(first)["status"] == DONE and store.get(first)["result"] == {"output": [1]}
+    assert not store.cancel(first)
+
+    assert store.cancel(second)
+    assert store.start(second) is None
+    assert store.get(second)["status"] == CANCELLED
+    assert store.get("missing") is None
+    assert store.counts() == {DONE: 1, CANCELLED: 1}
+
+
+def test_cancelled_running_job_keeps_no_result(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.submit("/get_mcq", ("mcq",), {})
+    store.start(job_id)
+    assert store.cancel(job_id)
+    store.finish(job_id, result={"output": []})
+    assert store.get(job_id)["status"] == CANCELLED
+    assert "result" not in store.get(job_id)
+
+
+def test_leases(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: clock[0])
+    path = str(tmp_path / "jobs.sqlite3")
+    owner = JobStore(path, lease_seconds=60)
+    job_id = owner.submit("/get_mcq", ("mcq",), {})
+    owner.start(job_id)
+
+    # Another process opening the file leaves a job with a live lease alone.
+    peer = JobStore(path, lease_seconds=60)
+    peer._host = "peer"
+    assert peer.requeued == 0
+    clock[0] += 50
+    owner.heartbeat()
+    clock[0] += 50
+    assert peer.requeue_expired() == 0
+
+    clock[0] += 61
+    assert peer.requeue_expired() == 1
+    assert peer.get(job_id)["status"] == QUEUED
+    peer.start(job_id)
+    # The process that lost the lease can no longer store its result.
+    owner.finish(job_id, result="stale")
+    assert peer.get(job_id)["status"] == RUNNING
+    peer.finish(job_id, result="fresh")
+    assert peer.get(job_id)["result"] == "fresh"
+
+
+def test_runner_family_limits(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    lock = threading.Lock()
+    running, overlaps = [], []
+    release = threading.Event()
+
+    def execute(endpoint, payload):
+        with lock:
+            running.append(endpoint)
+            overlaps.append(list(running))
+        release.wait(5)
+        with lock:
+            running.remove(endpoint)
+        if payload.get("fail"):
+            raise ValueError("bad input")
+        return endpoint
+
+    problems = store.submit("/get_problems", ("mcq", "boolq", "shortq"), {})
+    mcq = store.submit("/get_mcq", ("mcq",), {})
+    answer = store.submit("/get_shortq_answer", ("qa",), {"fail": True})
+    runner = JobRunner(store, execute, workers=3, poll_seconds=0.01)
+    runner.start()
+    try:
+        wait_for(lambda: len(running) == 2)
+        # /get_mcq waits for the mcq slot held by /get_problems; the qa job runs alongside.
+        assert sorted(running) == ["/get_problems", "/get_shortq_answer"]
+        assert runner.stats()["running"] == {"mcq": 1, "boolq": 1, "shortq": 1, "qa": 1}
+        release.set()
+        wait_for(lambda: store.get(mcq)["status"] == DONE)
+    finally:
+        release.set()
+        runner.shutdown()
+
+    assert store.get(problems)["result"] == "/get_problems"
+    assert store.get(answer)["status"] == FAILED and store.get(answer)["error"] == "bad input"
+    assert all(not ("/get_mcq" in overlap and "/get_problems" in overlap) for overlap in overlaps)
+
+
+def test_runner_family_limit_above_one(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def execute(endpoint, payload):
+        started.release()
+        release.wait(5)
+        return None
+
+    for _ in range(3):
+        store.submit("/get_shortq_hard", ("qg",), {})
+    runner = JobRunner(store, execute, workers=3, family_limits={"qg": 2}, poll_seconds=0.01)
+    runner.start()
+    try:
+        assert started.acquire(timeout=5) and started.acquire(timeout=5)
+        assert not started.acquire(timeout=0.2)
+        assert runner.stats()["running"] == {"qg": 2}
+    finally:
+        release.set()
+        runner.shutdown()
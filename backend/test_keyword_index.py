@@ -0,0 +1,45 @@
+"""Model-free unit tests of Generator.keyword_index."""
+from Generator.keyword_index import DocumentKeywordIndex, _Automaton
+
+SENTENCES = [
+    "Machine learning is a subset of artificial intelligence.",
+    "Deep learning uses neural networks with many layers.",
+    "Learning machines learn from data; machine-learning systems improve with experience.",
+]
+
+
+def test_automaton_finds_overlapping_matches():
+    automaton = _Automaton([("a", "b"), ("b",), ("b", "c", "d"), ("c",)])
+    assert sorted(automaton.matches(["a", "b", "c", "d", "b"])) == [(0, 1), (1, 1), (1, 4), (2, 3), (3, 2)]
+
+
+def test_postings_offsets_and_order():
+    index = DocumentKeywordIndex(SENTENCES)
+    # Case-insensitive on word boundaries: "machine-learning" is three tokens.
+    assert index.postings("Machine Learning") == [(0, 0)]
+    # Longest sentence first, in order of occurrence within a sentence.
+    postings = index.postings("learning")
+    assert postings == [(2, 0), (2, SENTENCES[2].index("learning systems")), (0, 8), (1, 5)]
+    for sentence_id, offset in postings:
+        assert SENTENCES[sentence_id][offset:offset + 8].lower() == "learning"
+
+
+def test_postings_record_keywords_inside_longer_ones():
+    index = DocumentKeywordIndex(SENTENCES)
+    index.add_keywords(["machine learning", "learning", "learning machines"])
+    assert index.postings("learning machines") == [(2, 0)]
+    assert len(index.postings("learning")) == 4
+    assert index.postings("learn") == [(2, SENTENCES[2].index("learn "))]
+
+
+def test_empty_keyword():
+    index = DocumentKeywordIndex(SENTENCES)
+    assert index.postings("") == []
+    assert index.postings("   ") == []
+    assert index.top_sentences(" ") == []
+
+
+def test_keyword_sentences():
+    index = DocumentKeywordIndex(SENTENCES)
+    mapping = index.keyword_sentences([" neural networks", "data", "quantum"], n=1)
+    assert mapping == {"neural networks": [SENTENCES[1]], "data": [SENTENCES[2]]}
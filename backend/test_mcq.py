@@ -0,0 +1,86 @@
+"""Model-free unit tests of the distractor filters in Generator.mcq."""
+import random
+import string
+
+from similarity.normalized_levenshtein import NormalizedLevenshtein
+
+from benchmarks.near_duplicate_filter import legacy_word_variations
+from benchmarks.phrase_filter import legacy_filter_useful_phrases, make_phrases
+from Generator.mcq import (
+    DistantPhraseIndex,
+    NearDuplicateFilter,
+    are_words_distant,
+    filter_useful_phrases,
+    within_edit_distance_one,
+)
+
+ALPHABET = "abc -'"
+
+
+def random_word(rng, min_length=1, max_length=6):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length)))
+
+
+def one_edit(word, rng):
+    i = rng.randrange(len(word) + 1)
+    edit = rng.choice(["delete", "insert", "replace", "transpose"])
+    if edit == "delete" and i < len(word):
+        return word[:i] + word[i + 1:]
+    if edit == "replace" and i < len(word):
+        return word[:i] + rng.choice(ALPHABET) + word[i + 1:]
+    if edit == "transpose" and i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(ALPHABET) + word[i:]
+
+
+def test_within_edit_distance_one_matches_variation_set():
+    rng = random.Random(0)
+    for _ in range(3000):
+        word = random_word(rng)
+        candidate = one_edit(word, rng) if rng.random() < 0.6 else random_word(rng)
+        expected = candidate == word or candidate in legacy_word_variations(word)
+        assert within_edit_distance_one(word, candidate) == expected, (word, candidate)
+        assert within_edit_distance_one(candidate, word) == expected, (candidate, word)
+
+
+def test_within_edit_distance_one_cases():
+    assert within_edit_distance_one("", "")
+    assert within_edit_distance_one("", "a")
+    assert not within_edit_distance_one("", "ab")
+    assert within_edit_distance_one("robotics", "robtoics")
+    assert not within_edit_distance_one("robotics", "rbootisc")
+    assert within_edit_distance_one("cell", "cells")
+    assert not within_edit_distance_one("cell", "cellar")
+
+
+def test_near_duplicate_filter():
+    near_duplicates = NearDuplicateFilter(["machine learning"])
+    for duplicate in ["Machine Learning", "machine-learning", "machine learnings", "machine learnig", "MachineLearning"]:
+        assert near_duplicates.is_duplicate(duplicate), duplicate
+    assert near_duplicates.accept("deep learning")
+    assert not near_duplicates.accept("Deep-Learning!")
+    assert near_duplicates.accept(string.capwords("data mining"))
+
+
+def test_distant_phrase_index_matches_exhaustive_scan():
+    normalized_levenshtein = NormalizedLevenshtein()
+    rng = random.Random(1)
+    for threshold in (0.3, 0.7):
+        index = DistantPhraseIndex(normalized_levenshtein, threshold)
+        accepted = []
+        for phrase in make_phrases(100, rng) + ["", "x", "X"]:
+            distant = index.is_distant(phrase)
+            if accepted:
+                assert distant == are_words_distant(accepted, phrase, threshold, normalized_levenshtein), phrase
+            index.add(phrase)
+            accepted.append(phrase)
+
+
+def test_filter_useful_phrases_matches_previous_filter():
+    normalized_levenshtein = NormalizedLevenshtein()
+    rng = random.Random(2)
+    for _ in range(50):
+        phrases = make_phrases(rng.randint(0, 40), rng)
+        assert filter_useful_phrases(phrases, 10, normalized_levenshtein) == legacy_filter_useful_phrases(
+            phrases, 10, normalized_levenshtein
+        )
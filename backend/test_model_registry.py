@@ -0,0 +1,110 @@
+"""Model-free unit tests of Generator.model_registry."""
+import threading
+import time
+
+import pytest
+import torch
+
+from Generator import config
+from Generator.model_registry import ModelRegistry, estimate_nbytes, prepare_seq2seq
+
+
+class Model:
+    def __init__(self):
+        self.closed = False
+
+
+def test_refcounted_sharing():
+    registry = ModelRegistry()
+    loads = []
+    first = registry.acquire("seq2seq", "m", lambda: loads.append(1) or Model(), close=lambda m: setattr(m, "closed", True))
+    second = registry.acquire("seq2seq", "m", lambda: loads.append(1) or Model())
+    assert first is second and len(loads) == 1
+    assert registry.stats()["models"]["seq2seq/m/cpu"]["refcount"] == 2
+
+    registry.release("seq2seq", "m")
+    assert not first.closed
+    registry.release("seq2seq", "m")
+    assert first.closed
+    assert registry.stats()["models"] == {}
+    # Releasing an unknown key is a no-op.
+    registry.release("seq2seq", "m")
+
+
+def test_slow_load_does_not_block_other_keys():
+    registry = ModelRegistry()
+    loading, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return Model()
+
+    slow = threading.Thread(target=lambda: results.append(registry.acquire("seq2seq", "slow", slow_loader)))
+    waiter = threading.Thread(target=lambda: results.append(registry.acquire("seq2seq", "slow", Model)))
+    slow.start()
+    assert loading.wait(5)
+    waiter.start()
+
+    start = time.monotonic()
+    registry.acquire("seq2seq", "fast", Model)
+    stats = registry.stats()
+    assert time.monotonic() - start < 1
+    assert stats["models"]["seq2seq/slow/cpu"]["loading"]
+
+    release.set()
+    slow.join()
+    waiter.join()
+    # The second caller waited for the first load instead of loading again.
+    assert len(results) == 2 and results[0] is results[1]
+    assert registry.stats()["models"]["seq2seq/slow/cpu"]["refcount"] == 2
+
+
+def test_failed_load_is_not_cached():
+    registry = ModelRegistry()
+
+    def broken():
+        raise OSError("download failed")
+
+    with pytest.raises(OSError):
+        registry.acquire("seq2seq", "m", broken)
+    assert registry.stats()["models"] == {}
+    assert isinstance(registry.acquire("seq2seq", "m", Model), Model)
+
+
+class TiedModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.embed = torch.nn.Embedding(100, 32)
+        self.hidden = torch.nn.Linear(32, 32)
+        self.head = torch.nn.Linear(32, 100, bias=False)
+        self.head.weight = self.embed.weight
+
+    def forward(self, ids):
+        return self.head(torch.relu(self.hidden(self.embed(ids))))
+
+
+def test_estimate_nbytes_counts_tied_weights_once():
+    model = TiedModel()
+    assert estimate_nbytes(model) == (100 * 32 + 32 * 32 + 32) * 4
+    assert estimate_nbytes(object()) is None
+
+
+def test_prepare_seq2seq_quantizes_only_when_enabled(monkeypatch):
+    inputs = torch.randn(4, 64)
+
+    monkeypatch.setattr(config, "QUANTIZE_INT8", False)
+    model = prepare_seq2seq(torch.nn.Sequential(torch.nn.Linear(64, 64), torch.nn.ReLU(), torch.nn.Linear(64, 8)), "cpu")
+    assert isinstance(model[0], torch.nn.Linear) and not model.training
+    fp32_bytes = estimate_nbytes(model)
+    with torch.inference_mode():
+        expected = model(inputs)
+
+    monkeypatch.setattr(config, "QUANTIZE_INT8", True)
+    quantized = prepare_seq2seq(model, "cpu")
+    assert isinstance(quantized[0], torch.ao.nn.quantized.dynamic.Linear)
+    # Packed int8 weights are measured, and smaller than the fp32 ones.
+    assert 0 < estimate_nbytes(quantized) < fp32_bytes / 2
+    with torch.inference_mode():
+        assert torch.allclose(quantized(inputs), expected, atol=0.1)
@@ -0,0 +1,31 @@
+"""Model-free unit tests of Generator.option_matching."""
+from benchmarks.option_matching import legacy_best_options
+from Generator.option_matching import best_options
+
+
+def test_picks_the_most_similar_option():
+    answers = ["the process of photosynthesis", "Paris", "a mammal"]
+    options = [
+        ["respiration", "photosynthesis in plants", "digestion"],
+        ["London", "Berlin", "Paris, France"],
+        ["a reptile", "a large mammal", "a bird"],
+    ]
+    assert best_options(answers, options) == [1, 2, 1]
+
+
+def test_matches_per_question_choice_on_clear_winners():
+    answers = ["cell membrane", "mitochondria produce energy", "the water cycle"]
+    options = [
+        ["cell wall", "cell membrane", "nucleus"],
+        ["ribosomes", "mitochondria", "chloroplasts"],
+        ["rock cycle", "carbon", "the water cycle"],
+    ]
+    assert best_options(answers, options) == legacy_best_options(answers, options)
+
+
+def test_questions_without_options_and_empty_vocabulary():
+    assert best_options(["x"], [[]]) == [None]
+    assert best_options(["answer", "b"], [["option", "other"], []]) == [0, None]
+    # Only one-letter tokens: TF-IDF has no vocabulary, every option ties and the first wins.
+    assert best_options(["a"], [["b", "c"]]) == [0]
+    assert best_options([], []) == []
@@ -0,0 +1,67 @@
+"""Model-free unit tests of Generator.result_cache."""
+import pytest
+
+from Generator import result_cache
+from Generator.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    return clock
+
+
+def test_key_normalizes_whitespace():
+    cache = ResultCache(None, "1")
+    assert cache.make_key("/get_mcq", " a  b\n c ", {"n": 4}) == cache.make_key("/get_mcq", "a b c", {"n": 4})
+    assert cache.make_key("/get_mcq", "a b c", {"n": 4}) != cache.make_key("/get_mcq", "a b c", {"n": 5})
+    assert cache.make_key("/get_mcq", "a", {}) != ResultCache(None, "2").make_key("/get_mcq", "a", {})
+
+
+def test_memory_lru_eviction(clock):
+    cache = ResultCache(None, "1", memory_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" was the least recently used.
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(clock, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), "1", ttl_seconds=10)
+    cache.set("a", {"x": 1})
+    clock.now += 9
+    assert cache.get("a") == {"x": 1}
+    clock.now += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expired"] == 2
+    assert stats["disk_entries"] == 0
+
+
+def test_disk_tier_and_lru_eviction(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResultCache(path, "1", memory_entries=1, disk_entries=2)
+    for key in "abc":
+        clock.now += 1
+        cache.set(key, key.upper())
+    # "a" was evicted from both tiers, "b" is only on disk.
+    assert cache.get("a") is None
+    assert cache.get("b") == "B"
+    assert cache.stats()["disk_hits"] == 1
+
+    reopened = ResultCache(path, "1")
+    assert reopened.get("c") == "C"
+    assert reopened.stats()["disk_entries"] == 2
@@ -0,0 +1,48 @@
+"""Model-free unit tests of Generator.retrieval."""
+from Generator import config
+from Generator.retrieval import BM25Index, WindowRetriever, question_contexts, window_ranges
+
+TEXT = " ".join("w%d" % i for i in range(10))
+
+
+def test_window_ranges_overlap_and_reach_the_end():
+    windows = [TEXT[start:end].split() for start, end in window_ranges(TEXT, 4, 3)]
+    assert windows == [["w0", "w1", "w2", "w3"], ["w3", "w4", "w5", "w6"], ["w6", "w7", "w8", "w9"]]
+    windows = [TEXT[start:end].split() for start, end in window_ranges(TEXT, 4, 4)]
+    assert windows[-1] == ["w6", "w7", "w8", "w9"]
+    assert window_ranges("   ", 4, 2) == []
+    assert [TEXT[start:end] for start, end in window_ranges(TEXT, 20, 5)] == [TEXT]
+
+
+def test_bm25_ranks_matching_documents_first():
+    index = BM25Index([
+        "the cat sat on the mat",
+        "dogs chase cats",
+        "a cat and a cat and a cat",
+        "nothing relevant here",
+    ])
+    assert index.top_k("cat", 2) == [2, 0]
+    assert index.top_k("unknown words", 2) == [0, 1]
+    assert index.top_k("cat", 10)[:2] == [2, 0]
+    assert BM25Index([]).top_k("cat", 3) == []
+
+
+def test_window_retriever_merges_overlapping_windows():
+    text = " ".join(["filler"] * 40 + ["photosynthesis makes sugar"] + ["filler"] * 40)
+    retriever = WindowRetriever(text, window_words=10, stride_words=5, top_k=2)
+    context = retriever.context("What does photosynthesis make?")
+    assert "photosynthesis makes sugar" in context
+    assert len(context.split()) <= 20
+
+
+def test_question_contexts(monkeypatch):
+    text = " ".join(["filler"] * 100 + ["mitochondria"] + ["filler"] * 100)
+    monkeypatch.setattr(config, "ANSWER_RETRIEVAL_MIN_WORDS", 0)
+    assert question_contexts(text, ["a", "b"]) == [text, text]
+    monkeypatch.setattr(config, "ANSWER_RETRIEVAL_MIN_WORDS", 50)
+    monkeypatch.setattr(config, "ANSWER_WINDOW_WORDS", 20)
+    monkeypatch.setattr(config, "ANSWER_WINDOW_STRIDE", 10)
+    monkeypatch.setattr(config, "ANSWER_TOP_WINDOWS", 1)
+    context, = question_contexts(text, ["Where are the mitochondria?"])
+    assert "mitochondria" in context and len(context.split()) == 20
+    assert question_contexts("", ["a"]) == [""]
@@ -1,5 +1,6 @@
 import requests
 import json
+import time
 
 BASE_URL = 'http://localhost:5000'
 
@@ -134,6 +135,30 @@ def test_get_problems_llm():
     assert types_found == {'mcq', 'boolean', 'short_answer'}
     print(f"  Generated mixed question set with {len(response['output'])} questions via Qwen3-0.6B LLM")
 
+def test_get_mcq_cached():
+    endpoint = '/get_mcq'
+    data = {
+        'input_text': input_text,
+        'max_questions': 5
+    }
+    first = make_post_request(endpoint, data)
+    second = make_post_request(endpoint, data)
+    assert first == second
+    stats = requests.get(f'{BASE_URL}/cache/stats').json()
+    print(f'/cache/stats Response: {stats}')
+    if stats['enabled']:
+        assert stats['memory_hits'] + stats['disk_hits'] > 0
+
+def test_get_mcq_bypass_cache():
+    endpoint = '/get_mcq'
+    data = {
+        'input_text': input_text,
+        'max_questions': 5,
+        'bypass_cache': True
+    }
+    response = make_post_request(endpoint, data)
+    assert 'output' in response
+
 def test_get_problems():
     endpoint = '/get_problems'
     data = {
@@ -147,6 +172,7 @@ def test_get_problems():
     assert 'output_mcq' in response
     assert 'output_boolq' in response
     assert 'output_shortq' in response
+    assert 'timing' in response
 
 def test_root():
     endpoint = '/'
@@ -154,6 +180,14 @@ def test_root():
     print(f'Root Endpoint Response: {response.text}')
     assert response.status_code == 200
 
+def test_model_stats():
+    endpoint = '/models/stats'
+    response = requests.get(f'{BASE_URL}{endpoint}').json()
+    print(f'/models/stats Response: {response}')
+    assert 'manager' in response
+    assert 'loads' in response['manager']['counters']
+    assert 'evictions' in response['manager']['counters']
+
 def test_get_answer():
     endpoint = '/get_answer'
     data = {
@@ -182,6 +216,43 @@ def test_get_boolean_answer():
     response = make_post_request(endpoint, data)
     print(f'/get_boolean_answer Response: {response}')
     assert 'output' in response
+    assert len(response['output']) == len(data['input_question'])
+
+def test_job():
+    data = {
+        'endpoint': '/get_mcq',
+        'payload': {'input_text': input_text, 'max_questions': 3}
+    }
+    response = requests.post(f'{BASE_URL}/jobs', json=data)
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+
+    deadline = time.time() + 300
+    job = requests.get(f'{BASE_URL}/jobs/{job_id}').json()
+    while job['status'] in ('queued', 'running') and time.time() < deadline:
+        time.sleep(1)
+        job = requests.get(f'{BASE_URL}/jobs/{job_id}').json()
+    print(f'/jobs/{job_id} Response: {job}')
+    assert job['status'] == 'done'
+    assert 'output' in job['result']
+
+def test_cancel_job():
+    data = {
+        'endpoint': '/get_boolq',
+        'payload': {'input_text': input_text, 'max_questions': 3}
+    }
+    job_id = requests.post(f'{BASE_URL}/jobs', json=data).json()['job_id']
+    response = requests.delete(f'{BASE_URL}/jobs/{job_id}')
+    print(f'DELETE /jobs/{job_id} Response: {response.json()}')
+    # The job may already have finished before the cancellation arrived.
+    assert response.status_code in (200, 409)
+    if response.status_code == 200:
+        assert requests.get(f'{BASE_URL}/jobs/{job_id}').json()['status'] == 'cancelled'
+
+def test_job_unknown_endpoint():
+    response = requests.post(f'{BASE_URL}/jobs', json={'endpoint': '/upload', 'payload': {}})
+    assert response.status_code == 400
+    assert requests.get(f'{BASE_URL}/jobs/does-not-exist').status_code == 404
 
 def make_post_request(endpoint, data):
     url = f'{BASE_URL}{endpoint}'
@@ -197,7 +268,13 @@ if __name__ == '__main__':
     test_get_mcq()
     test_get_boolq()
     test_get_shortq()
+    test_get_mcq_cached()
+    test_get_mcq_bypass_cache()
     test_get_problems()
     test_root()
+    test_model_stats()
     test_get_answer()
     test_get_boolean_answer()
+    test_job()
+    test_cancel_job()
+    test_job_unknown_endpoint()
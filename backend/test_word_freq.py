@@ -0,0 +1,39 @@
+"""Model-free unit tests of Generator.sorted_keys and Generator.word_freq."""
+from nltk import FreqDist
+
+from Generator.sorted_keys import SortedKeys, sort_keys, write_sorted_keys
+from Generator.word_freq import CompactFreqDist, build
+
+KEYS = ["zebra", "apple", "Apple", "élan", "eel", "naïve", "a", "ab", "日本", "apple pie"]
+
+
+def test_sorted_keys_find(tmp_path):
+    keys = sort_keys(KEYS)
+    write_sorted_keys(str(tmp_path), keys)
+    table = SortedKeys(str(tmp_path))
+    assert len(table) == len(KEYS)
+    for index, key in enumerate(keys):
+        assert table.find(key) == index
+        assert table.key(index) == key
+    for missing in ["", "appl", "zebras", "Élan", "b"]:
+        assert table.find(missing) is None
+
+
+def test_empty_table(tmp_path):
+    write_sorted_keys(str(tmp_path), [])
+    assert SortedKeys(str(tmp_path)).find("a") is None
+
+
+def test_compact_freq_dist_matches_freq_dist(tmp_path):
+    words = "the cat saw the other cat and the dog . The End".split()
+    path = str(tmp_path / "freq")
+    assert not CompactFreqDist.exists(path)
+    assert build(words, path) == len(set(words))
+    assert CompactFreqDist.exists(path)
+
+    compact, fdist = CompactFreqDist(path), FreqDist(words)
+    assert len(compact) == len(fdist)
+    assert compact.N() == fdist.N()
+    for word in set(words) | {"missing", "THE"}:
+        assert compact[word] == fdist[word]
+        assert (word in compact) == (word in fdist)